@@ -0,0 +1,98 @@
+"""
+Benchmark de idas ao MongoDB ao serializar uma lista de transações:
+uma consulta de categoria por transação (to_dict) versus resolução em lote
+(Transaction.to_dict_many, uma consulta $in por lista).
+
+Usa um usuário sintético em um banco de testes e remove os dados no final.
+
+Uso (a partir da raiz do projeto, com um MongoDB de testes):
+    MONGO_URI=mongodb://localhost:27017 MONGO_DB_NAME=bench_rezende \
+        python benchmarks/category_round_trips.py --transactions 1000 --categories 20
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from pymongo import monitoring
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Conta os comandos enviados ao servidor (cada um é uma ida ao banco)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# O listener precisa estar registrado antes da criação do MongoClient
+counter = CommandCounter()
+monitoring.register(counter)
+
+from database.mongodb import mongodb  # noqa: E402
+from models.transaction_mongo import Transaction  # noqa: E402
+
+
+def seed(user_id, transactions, categories):
+    category_ids = mongodb.db.categories.insert_many([
+        {'user_id': user_id, 'name': f'Bench {i}', 'context': 'business', 'type': 'expense'}
+        for i in range(categories)
+    ]).inserted_ids
+
+    base = datetime(2024, 1, 1)
+    mongodb.db.transactions.insert_many([
+        {
+            'user_id': user_id,
+            'description': f'Transação {i}',
+            'amount': float(i % 500),
+            'type': 'expense',
+            'context': 'business',
+            'category_id': str(category_ids[i % categories]),
+            'date': base + timedelta(hours=i),
+            'status': 'paid'
+        }
+        for i in range(transactions)
+    ])
+
+
+def measure(label, serialize, transactions):
+    counter.count = 0
+    start = time.perf_counter()
+    result = serialize(transactions)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{label:<32} {counter.count:>6} idas ao banco {elapsed:>10.1f} ms ({len(result)} itens)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Idas ao banco por requisição de listagem')
+    parser.add_argument('--transactions', type=int, default=1000)
+    parser.add_argument('--categories', type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = f'bench-{uuid.uuid4()}'
+    seed(user_id, args.transactions, args.categories)
+
+    try:
+        transactions = Transaction.find_all({'user_id': user_id})
+        print(f"{len(transactions)} transações, {args.categories} categorias")
+        measure('Por transação (to_dict)', lambda ts: [t.to_dict() for t in ts], transactions)
+        measure('Em lote (to_dict_many)', lambda ts: Transaction.to_dict_many(ts, user_id=user_id), transactions)
+    finally:
+        mongodb.db.transactions.delete_many({'user_id': user_id})
+        mongodb.db.categories.delete_many({'user_id': user_id})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark do cronograma de recorrências (/recurring/preview): custo de uma
+página de ocorrências e do total para horizontes longos, comparado com a
+geração data a data.
+
+Não usa banco de dados.
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/recurring_preview.py --years 50 --page-size 50
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import date
+from itertools import islice
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from services import recurrence  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Custo do cronograma de recorrências')
+    parser.add_argument('--years', type=int, default=50)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=1000)
+    args = parser.parse_args()
+
+    start = date.today()
+    end = recurrence.add_months(start, args.years * 12)
+
+    for frequency, day in (('weekly', 4), ('monthly', 31), ('yearly', 366)):
+        page_us = timeit.timeit(
+            lambda: recurrence.page(frequency, day, start, end, offset=0, limit=args.page_size),
+            number=args.runs
+        ) / args.runs * 1e6
+        last_page_us = timeit.timeit(
+            lambda: recurrence.page(frequency, day, start, end, offset=10 ** 9, limit=args.page_size),
+            number=args.runs
+        ) / args.runs * 1e6
+        full_us = timeit.timeit(
+            lambda: sum(1 for _ in recurrence.iter_occurrences(frequency, day, start, end)),
+            number=max(args.runs // 100, 1)
+        ) / max(args.runs // 100, 1) * 1e6
+        first_page = list(islice(recurrence.iter_occurrences(frequency, day, start), args.page_size))
+        assert first_page == recurrence.page(frequency, day, start, end, limit=args.page_size)[0][:len(first_page)]
+
+        _, total = recurrence.page(frequency, day, start, end, limit=0)
+        print(f"{frequency:<8} {total:>6} ocorrências | página: {page_us:8.1f} µs | "
+              f"total sem página: {last_page_us:6.1f} µs | iteração completa: {full_us:10.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
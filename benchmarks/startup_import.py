@@ -0,0 +1,69 @@
+"""
+Benchmark de inicialização: custo de importar o módulo de autenticação e
+custo da inicialização do Firebase Admin SDK, que antes acontecia na importação.
+
+Cada medição roda em um processo Python novo (cold start).
+
+Uso (a partir da raiz do projeto):
+    python benchmarks/startup_import.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+PROBE = r"""
+import json, sys, time
+sys.path.insert(0, %(src)r)
+
+start = time.perf_counter()
+import auth
+import_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+try:
+    auth.initialize_firebase()
+    init_error = None
+except Exception as e:
+    init_error = str(e)
+init_seconds = time.perf_counter() - start
+
+print(json.dumps({'import': import_seconds, 'init': init_seconds, 'init_error': init_error}))
+"""
+
+
+def run_probe():
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE % {'src': SRC_DIR}],
+        capture_output=True, text=True, check=True
+    ).stdout
+    # A última linha é o JSON; as anteriores são logs do Firebase
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_probe() for _ in range(args.runs)]
+    import_ms = statistics.median(r['import'] for r in results) * 1000
+    init_ms = statistics.median(r['init'] for r in results) * 1000
+
+    print(f"Execuções: {args.runs}")
+    print(f"Importação de auth (lazy):             {import_ms:8.1f} ms")
+    print(f"Inicialização do Firebase (1º uso):    {init_ms:8.1f} ms")
+    print(f"Importação antiga estimada (import+init): {import_ms + init_ms:8.1f} ms")
+    print(f"Economia no import por processo:       {init_ms:8.1f} ms")
+
+    errors = {r['init_error'] for r in results if r['init_error']}
+    if errors:
+        print(f"AVISO: a inicialização falhou nas medições: {errors.pop()}")
+
+
+if __name__ == '__main__':
+    main()
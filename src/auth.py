@@ -3,23 +3,53 @@ from firebase_admin import credentials, auth
 from flask import request, jsonify
 from functools import wraps
 import os
+import threading
+import time
 import requests # Para fazer requisições HTTP para a API REST do Firebase Auth
+from services.token_cache import token_cache
+from services.http_client import get_session, default_timeout
+from services.metrics import Histogram
+from services.token_verifier import token_verifier, SigningKeysUnavailable
+from config import Config
 
 # CORREÇÃO: Variável global para controlar se Firebase já foi inicializado
 _firebase_initialized = False
+# PID do processo que inicializou o Firebase (detecta fork do gunicorn)
+_firebase_pid = None
+_firebase_lock = threading.Lock()
+
+# Latência das verificações de senha na API REST do Firebase Auth
+login_latency = Histogram('firebase_password_login_seconds')
 
 def initialize_firebase():
-    """Inicializa Firebase apenas uma vez"""
-    global _firebase_initialized
+    """Inicializa Firebase sob demanda, uma única vez por processo (thread-safe).
+
+    Não é mais chamada na importação do módulo: a carga das credenciais acontece
+    no primeiro uso dentro de cada worker, depois do fork do gunicorn.
+    """
+    if _firebase_initialized and _firebase_pid == os.getpid():
+        return
+
+    with _firebase_lock:
+        _initialize_firebase_app()
+
+def _initialize_firebase_app():
+    """Inicializa o Firebase Admin SDK neste processo (chamar com _firebase_lock)"""
+    global _firebase_initialized, _firebase_pid
     
-    if _firebase_initialized:
+    if _firebase_initialized and _firebase_pid == os.getpid():
         return
     
     try:
         # Verificar se já existe uma app Firebase
-        firebase_admin.get_app()
-        _firebase_initialized = True
-        return
+        app = firebase_admin.get_app()
+        if _firebase_pid is not None and _firebase_pid != os.getpid():
+            # App herdada do processo pai (fork): recria para não compartilhar conexões
+            firebase_admin.delete_app(app)
+        else:
+            _firebase_initialized = True
+            _firebase_pid = os.getpid()
+            return
     except ValueError:
         # App não existe, pode inicializar
         pass
@@ -48,13 +78,35 @@ def initialize_firebase():
     try:
         firebase_admin.initialize_app(cred)
         _firebase_initialized = True
-        print("Firebase Admin SDK inicializado com sucesso!")
+        _firebase_pid = os.getpid()
+        print(f"Firebase Admin SDK inicializado com sucesso! (pid {_firebase_pid})")
     except Exception as e:
         print(f"Erro ao inicializar Firebase: {e}")
         raise
 
-# Inicializar Firebase quando o módulo for importado
-initialize_firebase()
+# A inicialização não acontece mais na importação do módulo: veja initialize_firebase()
+
+_project_id = None
+
+def get_project_id():
+    """ID do projeto Firebase usado como audiência na verificação dos tokens"""
+    global _project_id
+
+    if _project_id is None:
+        if Config.FIREBASE_PROJECT_ID:
+            _project_id = Config.FIREBASE_PROJECT_ID
+        else:
+            initialize_firebase()
+            _project_id = firebase_admin.get_app().project_id
+    return _project_id
+
+def verify_id_token_cached(token):
+    """Verifica um token de ID localmente, reaproveitando verificações anteriores"""
+    decoded_token = token_cache.get(token)
+    if decoded_token is None:
+        decoded_token = token_verifier.verify(token, get_project_id())
+        token_cache.set(token, decoded_token)
+    return decoded_token
 
 def verify_token(f):
     """Decorator para verificar token de autenticação Firebase"""
@@ -74,10 +126,13 @@ def verify_token(f):
             return jsonify({'error': 'Token de autenticação necessário'}), 401
 
         try:
-            # Verificar o token com Firebase
-            decoded_token = auth.verify_id_token(token)
+            # Verificar o token localmente (sem chamadas de rede no caminho da requisição)
+            decoded_token = verify_id_token_cached(token)
             # Passa o UID do usuário para a função decorada
             return f(decoded_token['uid'], *args, **kwargs)
+        except SigningKeysUnavailable as e:
+            print(f"Erro ao verificar token: {e}")
+            return jsonify({'error': 'Serviço de autenticação temporariamente indisponível'}), 503
         except Exception as e:
             print(f"Erro ao verificar token: {e}")
             return jsonify({'error': 'Token inválido ou expirado'}), 401
@@ -88,6 +143,7 @@ def verify_token(f):
 def create_user(email, password, display_name=None):
     """Criar um novo usuário no Firebase"""
     try:
+        initialize_firebase()
         user = auth.create_user(
             email=email,
             password=password,
@@ -101,6 +157,7 @@ def create_user(email, password, display_name=None):
 def generate_custom_token(uid):
     """Gera um token customizado do Firebase para um UID."""
     try:
+        initialize_firebase()
         custom_token = auth.create_custom_token(uid)
         return custom_token.decode('utf-8') # Retorna como string
     except Exception as e:
@@ -119,16 +176,17 @@ def verify_password_and_get_uid(email, password):
         print("ERRO: FIREBASE_WEB_API_KEY não configurada. Não é possível verificar a senha.")
         return None
 
-    rest_api_url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={FIREBASE_WEB_API_KEY}"
-    headers = {"Content-Type": "application/json"}
+    rest_api_url = f"{Config.FIREBASE_AUTH_BASE_URL}/v1/accounts:signInWithPassword?key={FIREBASE_WEB_API_KEY}"
     payload = {
         "email": email,
         "password": password,
         "returnSecureToken": True
     }
 
+    start = time.perf_counter()
     try:
-        response = requests.post(rest_api_url, headers=headers, json=payload)
+        # Sessão compartilhada: reaproveita conexões TLS e aplica timeouts/retentativas
+        response = get_session().post(rest_api_url, json=payload, timeout=default_timeout())
         response_data = response.json()
 
         if response.status_code == 200 and "localId" in response_data:
@@ -136,9 +194,11 @@ def verify_password_and_get_uid(email, password):
         else:
             print(f"Erro na verificação de senha Firebase: {response_data.get('error', {}).get('message', 'Erro desconhecido')}")
             return None
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Erro de conexão ao verificar senha Firebase: {e}")
         return None
+    finally:
+        login_latency.observe(time.perf_counter() - start)
 
 
 # As funções abaixo não são mais usadas diretamente pelo auth.py de rotas
@@ -147,6 +207,7 @@ def verify_password_and_get_uid(email, password):
 def get_user_by_email(email):
     """Buscar usuário por email"""
     try:
+        initialize_firebase()
         user = auth.get_user_by_email(email)
         return {
             'success': True,
@@ -164,6 +225,7 @@ def get_user_by_email(email):
 def update_user(uid, **kwargs):
     """Atualizar dados do usuário"""
     try:
+        initialize_firebase()
         user = auth.update_user(uid, **kwargs)
         return {'success': True, 'uid': user.uid}
     except Exception as e:
@@ -173,6 +235,7 @@ def update_user(uid, **kwargs):
 def delete_user(uid):
     """Deletar usuário"""
     try:
+        initialize_firebase()
         auth.delete_user(uid)
         return {'success': True}
     except Exception as e:
@@ -182,7 +245,7 @@ def delete_user(uid):
 def verify_user_token(token):
     """Verificar token do usuário"""
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = verify_id_token_cached(token)
         return {'success': True, 'user': decoded_token}
     except Exception as e:
         return {'success': False, 'error': str(e)}
@@ -19,10 +19,58 @@ class Config:
     
     # URI de conexão para o MongoDB (lida do segredo MONGO_URI no Render)
     MONGO_URI = os.getenv('MONGO_URI')
+    MONGO_DB_NAME = os.getenv('MONGO_DB_NAME', 'contabilidade_rezende')
+    
+    # Pool de conexões do MongoClient (um pool por worker do gunicorn)
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', '300000'))
+    
+    # Timeouts (ms). MONGO_SOCKET_TIMEOUT_MS=0 mantém o padrão do pymongo (sem limite).
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '0'))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+    
+    # Compressão do protocolo (ex.: "zstd,snappy,zlib"). zstd requer o pacote zstandard
+    # e snappy o python-snappy; os indisponíveis são ignorados.
+    MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', 'zstd,zlib')
+    
+    # primary, primaryPreferred, secondary, secondaryPreferred ou nearest
+    MONGO_READ_PREFERENCE = os.getenv('MONGO_READ_PREFERENCE', 'primary')
+    MONGO_APP_NAME = os.getenv('MONGO_APP_NAME', 'rezende-inteligente')
+    
+    # Aplica os índices de database/indexes.py na inicialização (idempotente)
+    MONGO_ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', 'true').lower() == 'true'
+    
+    # Busca de usuários sem username_lc/email_lc (case-insensitive por regex, sem índice).
+    # 'auto' verifica uma vez na inicialização se ainda existem; use 'false' depois
+    # do "flask --app src.main backfill-users" para nem fazer a verificação.
+    USERS_LEGACY_LOOKUP = os.getenv('USERS_LEGACY_LOOKUP', 'auto').lower()
+    
+    # Lê os totais mensais do dashboard de monthly_rollups (ver models/rollup_mongo.py).
+    # Habilitar após "flask --app src.main rebuild-rollups".
+    DASHBOARD_USE_ROLLUPS = os.getenv('DASHBOARD_USE_ROLLUPS', 'false').lower() == 'true'
+    
+    # --- Scheduler de recorrências (src/scheduler.py) ---
+    
+    SCHEDULER_INTERVAL_SECONDS = int(os.getenv('SCHEDULER_INTERVAL_SECONDS', '300'))
+    # Modelos recorrentes processados por lote (um bulk upsert por lote)
+    SCHEDULER_BATCH_SIZE = int(os.getenv('SCHEDULER_BATCH_SIZE', '200'))
+    # Prazo do lease; renovado a cada lote. Se o worker morrer, outra instância assume depois disso
+    SCHEDULER_LEASE_SECONDS = int(os.getenv('SCHEDULER_LEASE_SECONDS', '120'))
     
     # URL de conexão para o Redis (lida do segredo REDIS_URL no Render)
     REDIS_URL = os.getenv('REDIS_URL')
     
+    # Timeout (em segundos) das operações no Redis. Os caches tratam falhas como "miss".
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '0.5'))
+    
+    # --- Cache de tokens do Firebase já verificados ---
+    
+    # Número máximo de tokens mantidos no cache em memória de cada processo
+    TOKEN_CACHE_MAX_SIZE = int(os.getenv('TOKEN_CACHE_MAX_SIZE', '10000'))
+    
     # --- Configuração do Cloudinary (para armazenamento de imagens/mídia) ---
     
     CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
@@ -36,4 +84,62 @@ class Config:
     # apontando para o local do "Secret File" que você subiu.
     # Se o nome do arquivo no Render for "firebase-credentials.json", a variável será esta.
     FIREBASE_CREDENTIALS_PATH = os.getenv('FIREBASE_CREDENTIALS_JSON_PATH')
+    
+    # ID do projeto Firebase (audiência dos tokens). Se ausente, é lido das credenciais do Admin SDK.
+    FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID')
+    
+    # Endpoint das chaves públicas usadas para verificar os tokens localmente.
+    # Pode apontar para um servidor local durante testes.
+    FIREBASE_CERTS_URL = os.getenv(
+        'FIREBASE_CERTS_URL',
+        'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+    )
+    FIREBASE_CERTS_TIMEOUT = float(os.getenv('FIREBASE_CERTS_TIMEOUT', '5'))
+    
+    # Tempo máximo (segundos) que uma requisição espera pela carga inicial das chaves
+    FIREBASE_CERTS_INITIAL_WAIT = float(os.getenv('FIREBASE_CERTS_INITIAL_WAIT', '5'))
+    
+    # Por quanto tempo (segundos) após o vencimento as chaves ainda são usadas quando
+    # a renovação falha; depois disso a autenticação responde 503 até renovar
+    FIREBASE_CERTS_MAX_STALENESS = float(os.getenv('FIREBASE_CERTS_MAX_STALENESS', '3600'))
+    
+    # URL base da API REST do Firebase Auth (login com senha).
+    # Pode apontar para um servidor local em benchmarks.
+    FIREBASE_AUTH_BASE_URL = os.getenv('FIREBASE_AUTH_BASE_URL', 'https://identitytoolkit.googleapis.com')
+    
+    # Token de operação exigido por /api/health/metrics (header X-Metrics-Token).
+    # Sem valor a rota fica desativada.
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    
+    # --- Cache de categorias por usuário ---
+    
+    # Entradas (usuário, contexto) mantidas em memória por processo
+    CATEGORY_CACHE_MAX_SIZE = int(os.getenv('CATEGORY_CACHE_MAX_SIZE', '5000'))
+    # Tempo de vida (segundos). A invalidação por versão vale para todos os workers
+    # (Redis ou coleção cache_versions); o TTL só limita a defasagem se ela falhar.
+    CATEGORY_CACHE_TTL = int(os.getenv('CATEGORY_CACHE_TTL', '60'))
+    
+    # --- Cache de respostas (dashboard, categorias, listagem de transações) ---
+    
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_MAX_SIZE = int(os.getenv('RESPONSE_CACHE_MAX_SIZE', '2000'))
+    # A invalidação usa a versão de dados compartilhada (services/data_version.py);
+    # o TTL limita o tempo de vida das entradas em memória
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '30'))
+    # Respostas maiores que isto (bytes) não são guardadas
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(1024 * 1024)))
+    
+    # --- Onboarding ---
+    
+    # Arquivo JSON opcional com o catálogo de categorias padrão dos novos usuários
+    # (lista de objetos com name, context, type, color, icon, emoji).
+    DEFAULT_CATEGORIES_PATH = os.getenv('DEFAULT_CATEGORIES_PATH')
+    
+    # --- Cliente HTTP compartilhado (chamadas a serviços externos) ---
+    
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
 
@@ -0,0 +1,146 @@
+# ARQUIVO: src/database/indexes.py
+# Registro central dos índices de todas as coleções do MongoDB.
+#
+# Os índices são aplicados de forma idempotente na inicialização da aplicação
+# (Config.MONGO_ENSURE_INDEXES) e pelo comando "flask --app src.main ensure-indexes".
+# "flask --app src.main index-status" mostra o estado de cada índice declarado.
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+from database.mongodb import mongodb
+
+INDEXES = {
+    'transactions': [
+        # Listagem padrão: filtro por usuário, ordenação estável por (date, _id),
+        # que também é a chave da paginação por cursor
+        IndexModel([('user_id', ASCENDING), ('date', DESCENDING), ('_id', DESCENDING)], name='user_date_id'),
+        # Filtros por contexto (business/personal) e intervalo de datas (mês)
+        IndexModel([('user_id', ASCENDING), ('context', ASCENDING), ('date', DESCENDING), ('_id', DESCENDING)],
+                   name='user_context_date_id'),
+        # Filtros por tipo dentro do contexto
+        IndexModel([('user_id', ASCENDING), ('context', ASCENDING), ('type', ASCENDING), ('date', DESCENDING),
+                    ('_id', DESCENDING)], name='user_context_type_date_id'),
+        # Pendências (dashboard) e filtros por status
+        IndexModel([('user_id', ASCENDING), ('context', ASCENDING), ('status', ASCENDING), ('type', ASCENDING),
+                    ('date', DESCENDING), ('_id', DESCENDING)], name='user_context_status_type_date_id'),
+        # Busca na descrição (Transaction.search): índice de texto em português, restrito
+        # ao usuário pelo prefixo de igualdade. Apenas um índice de texto por coleção.
+        IndexModel([('user_id', ASCENDING), ('description', TEXT)], name='user_description_text',
+                   default_language='portuguese', language_override='text_language'),
+        # Uma transação por ocorrência de modelo recorrente (geração idempotente)
+        IndexModel([('recurrence_key', ASCENDING)], name='recurrence_key_unique', unique=True,
+                   partialFilterExpression={'recurrence_key': {'$type': 'string'}}),
+    ],
+    'categories': [
+        IndexModel([('user_id', ASCENDING), ('context', ASCENDING), ('name', ASCENDING)],
+                   name='user_context_name_unique', unique=True),
+        # Listagem de todas as categorias do usuário ordenadas por nome
+        IndexModel([('user_id', ASCENDING), ('name', ASCENDING)], name='user_name'),
+    ],
+    'recurring_templates': [
+        # Modelos vencidos de todos os usuários (processamento em lote, paginado por next_occurrence e _id)
+        IndexModel([('recurring_active', ASCENDING), ('next_occurrence', ASCENDING), ('_id', ASCENDING)],
+                   name='active_next_occurrence'),
+        # Modelos vencidos de um usuário e listagem por contexto
+        IndexModel([('user_id', ASCENDING), ('recurring_active', ASCENDING), ('next_occurrence', ASCENDING)],
+                   name='user_active_next_occurrence'),
+        IndexModel([('user_id', ASCENDING), ('context', ASCENDING), ('next_occurrence', ASCENDING)],
+                   name='user_context_next_occurrence'),
+        # No máximo um modelo por transação de origem (create_from_transaction)
+        IndexModel([('user_id', ASCENDING), ('source_transaction_id', ASCENDING)],
+                   name='user_source_transaction_unique', unique=True,
+                   partialFilterExpression={'source_transaction_id': {'$type': 'string'}}),
+    ],
+    'monthly_rollups': [
+        # Totais de um mês (dashboard) e de um ano (relatórios) do usuário
+        IndexModel([('user_id', ASCENDING), ('context', ASCENDING), ('year', ASCENDING), ('month', ASCENDING)],
+                   name='user_context_year_month'),
+    ],
+    'users': [
+        IndexModel([('uid', ASCENDING)], name='uid_unique', unique=True),
+        # O filtro parcial ignora documentos ainda sem o campo (antes do backfill)
+        IndexModel([('username_lc', ASCENDING)], name='username_lc_unique', unique=True,
+                   partialFilterExpression={'username_lc': {'$type': 'string'}}),
+        IndexModel([('email_lc', ASCENDING)], name='email_lc_unique', unique=True,
+                   partialFilterExpression={'email_lc': {'$type': 'string'}}),
+    ],
+    'documents': [
+        IndexModel([('context', ASCENDING), ('document_type', ASCENDING), ('uploaded_at', DESCENDING)],
+                   name='context_type_uploaded'),
+        IndexModel([('uploaded_at', DESCENDING)], name='uploaded_at'),
+    ],
+    'bank_extracts': [
+        IndexModel([('context', ASCENDING), ('uploaded_at', DESCENDING)], name='context_uploaded'),
+        IndexModel([('uploaded_at', DESCENDING)], name='uploaded_at'),
+    ],
+}
+
+
+def ensure_indexes(collections=None):
+    """
+    Cria os índices declarados (idempotente: índices existentes são mantidos).
+
+    Args:
+        collections: Lista de coleções a processar (padrão: todas do registro)
+
+    Returns:
+        dict: Por coleção, os nomes dos índices aplicados ou o erro ocorrido
+    """
+    report = {}
+    for collection_name in collections or INDEXES.keys():
+        models = INDEXES[collection_name]
+        try:
+            names = mongodb.db[collection_name].create_indexes(models)
+            report[collection_name] = {'success': True, 'indexes': names}
+        except PyMongoError as e:
+            # Ex.: duplicatas impedindo um índice único, ou índice com mesmo nome e opções diferentes
+            report[collection_name] = {'success': False, 'error': str(e)}
+    return report
+
+
+def _building_indexes():
+    """Índices em construção no servidor, agrupados por (coleção, nome)"""
+    building = {}
+    try:
+        operations = mongodb.client.admin.aggregate([
+            {'$currentOp': {'allUsers': True, 'idleConnections': False}},
+            {'$match': {'command.createIndexes': {'$exists': True}}}
+        ])
+        for op in operations:
+            collection_name = op['command']['createIndexes']
+            for index in op['command'].get('indexes', []):
+                building[(collection_name, index.get('name'))] = op.get('msg') or op.get('progress')
+    except OperationFailure:
+        # Usuário sem permissão para $currentOp (ex.: clusters compartilhados)
+        pass
+    return building
+
+
+def index_status():
+    """
+    Estado de cada índice declarado no registro.
+
+    Returns:
+        list: Itens com collection, name, state ('ready', 'building' ou 'missing') e progress
+    """
+    building = _building_indexes()
+    status = []
+
+    for collection_name, models in INDEXES.items():
+        existing = {index['name'] for index in mongodb.db[collection_name].list_indexes()}
+        for model in models:
+            name = model.document['name']
+            if (collection_name, name) in building:
+                state = 'building'
+            elif name in existing:
+                state = 'ready'
+            else:
+                state = 'missing'
+            status.append({
+                'collection': collection_name,
+                'name': name,
+                'state': state,
+                'progress': building.get((collection_name, name))
+            })
+
+    return status
@@ -1,31 +1,156 @@
-from pymongo import MongoClient
-from src.config import Config
 import os
+import threading
+from pymongo import MongoClient, monitoring
+from config import Config
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Contadores do pool de conexões do MongoClient deste processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def _inc(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._inc('pool_clears')
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._inc('created')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._inc('closed')
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._inc('checkout_failures')
+
+    def connection_checked_out(self, event):
+        self._inc('checkouts')
+
+    def connection_checked_in(self, event):
+        self._inc('checkins')
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'open_connections': self.created - self.closed,
+                'in_use': self.checkouts - self.checkins,
+                'connections_created': self.created,
+                'connections_closed': self.closed,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'pool_clears': self.pool_clears
+            }
+
 
 class MongoDB:
+    """
+    Gerenciador da conexão com o MongoDB.
+
+    O MongoClient é criado sob demanda no primeiro acesso e recriado quando o
+    processo muda (fork dos workers do gunicorn), de modo que cada worker tem
+    seu próprio pool. Tamanho do pool, timeouts, compressão e read preference
+    vêm do Config.
+    """
     _instance = None
     _client = None
-    _db = None
-    
+    _client_pid = None
+    _pool_stats = None
+    _lock = threading.Lock()
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(MongoDB, cls).__new__(cls)
         return cls._instance
-    
-    def __init__(self):
-        if self._client is None:
-            self._client = MongoClient(Config.MONGO_URI)
-            # Especificar o nome do banco de dados
-            self._db = self._client['contabilidade_rezende']
-    
-    @property
-    def db(self):
-        return self._db
-    
+
+    @staticmethod
+    def client_options():
+        """Opções do MongoClient a partir do Config"""
+        options = {
+            'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+            'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+            'maxIdleTimeMS': Config.MONGO_MAX_IDLE_TIME_MS,
+            'connectTimeoutMS': Config.MONGO_CONNECT_TIMEOUT_MS,
+            'serverSelectionTimeoutMS': Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            'waitQueueTimeoutMS': Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            'readPreference': Config.MONGO_READ_PREFERENCE,
+            'appname': Config.MONGO_APP_NAME
+        }
+        if Config.MONGO_SOCKET_TIMEOUT_MS:
+            options['socketTimeoutMS'] = Config.MONGO_SOCKET_TIMEOUT_MS
+        if Config.MONGO_COMPRESSORS:
+            # Compressores sem a biblioteca instalada são ignorados pelo pymongo
+            options['compressors'] = Config.MONGO_COMPRESSORS
+        return options
+
+    def _connect(self):
+        with self._lock:
+            if self._client is None or self._client_pid != os.getpid():
+                # Um cliente herdado do processo pai não é reutilizado nem fechado aqui
+                pool_stats = PoolStats()
+                MongoDB._client = MongoClient(
+                    Config.MONGO_URI,
+                    event_listeners=[pool_stats],
+                    **self.client_options()
+                )
+                MongoDB._pool_stats = pool_stats
+                MongoDB._client_pid = os.getpid()
+        return self._client
+
     @property
     def client(self):
+        if self._client is None or self._client_pid != os.getpid():
+            return self._connect()
         return self._client
 
+    @property
+    def db(self):
+        # Especificar o nome do banco de dados
+        return self.client[Config.MONGO_DB_NAME]
+
+    def stats(self):
+        """Uso do pool de conexões deste processo"""
+        if self._client is None or self._client_pid != os.getpid():
+            return {'connected': False, 'pid': os.getpid()}
+
+        stats = self._pool_stats.snapshot()
+        stats.update({
+            'connected': True,
+            'pid': self._client_pid,
+            'max_pool_size': Config.MONGO_MAX_POOL_SIZE,
+            'min_pool_size': Config.MONGO_MIN_POOL_SIZE
+        })
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._client_pid == os.getpid():
+                self._client.close()
+            MongoDB._client = None
+            MongoDB._client_pid = None
+
 # Instância global
 mongodb = MongoDB()
-
@@ -1,16 +1,21 @@
 # ARQUIVO: src/main.py
 
+import hmac
 import os
 import sys
 
 # Ajuste para que o Python encontre os módulos dentro de 'src'
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 
-from flask import Flask, send_from_directory, jsonify
+import click
+from flask import Flask, send_from_directory, jsonify, request
 from flask_cors import CORS
 from config import Config
 from database.mongodb import mongodb
+from database.indexes import ensure_indexes, index_status
 from models.category_mongo import Category
+from models.rollup_mongo import MonthlyRollup
+from models.user_mongo import User, detect_legacy_users, set_legacy_lookup
 from routes.user_mongo import user_bp
 from routes.transactions_mongo import transactions_bp
 from routes.categories_mongo import categories_bp
@@ -21,6 +26,12 @@ from routes.auth import auth_bp
 from routes.recurring import recurring_bp
 from routes.document_processing import document_processing_bp
 from routes.reports_export import reports_export_bp
+from services.token_cache import token_cache
+from services.token_verifier import token_verifier
+from auth import login_latency
+from services.category_cache import category_cache
+from services.response_cache import response_cache
+from scheduler import last_run as scheduler_last_run
 
 # AJUSTE: Aponta para 'static/dist' onde o Vite coloca os arquivos buildados
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static', 'dist'))
@@ -43,11 +54,24 @@ app.register_blueprint(reports_export_bp, url_prefix='/api')
 
 # Initialize MongoDB connection and seed data
 with app.app_context():
+    # Carrega as chaves públicas do Firebase em segundo plano
+    token_verifier.start()
+
     # Test MongoDB connection
     try:
         mongodb.client.admin.command('ping')
         print("MongoDB connection successful!")
         
+        if Config.MONGO_ENSURE_INDEXES:
+            for collection_name, result in ensure_indexes().items():
+                if not result['success']:
+                    print(f"AVISO: Falha ao criar índices de '{collection_name}': {result['error']}")
+            print("Índices do MongoDB verificados!")
+        
+        # Decide uma vez se a busca de usuários ainda precisa do modo legado
+        if detect_legacy_users():
+            print("AVISO: há usuários sem username_lc/email_lc; execute 'flask --app src.main backfill-users'")
+        
         # Seed default categories
        # Category.seed_default_categories()
        # print("Default categories seeded!")
@@ -60,6 +84,91 @@ def health_check():
     """Rota leve para manter o serviço ativo."""
     return jsonify({"status": "ok"}), 200
 
+@app.route('/api/health/metrics')
+def health_metrics():
+    """Métricas internas dos caches e clientes deste processo.
+
+    Restrita à operação: exige o header X-Metrics-Token igual a
+    Config.METRICS_TOKEN; sem token configurado a rota não existe (404).
+    A sonda pública de disponibilidade continua sendo /api/health.
+    """
+    if not Config.METRICS_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    token = request.headers.get('X-Metrics-Token', '')
+    if not hmac.compare_digest(token.encode(), Config.METRICS_TOKEN.encode()):
+        return jsonify({"error": "Token de métricas inválido"}), 401
+
+    # A última execução do scheduler vem do MongoDB: uma falha na leitura
+    # não deve derrubar as métricas locais
+    try:
+        scheduler = scheduler_last_run()
+    except Exception as e:
+        print(f"Erro ao ler a última execução do scheduler: {e}")
+        scheduler = {"error": str(e)}
+
+    return jsonify({
+        "pid": os.getpid(),
+        "token_cache": token_cache.stats(),
+        "category_cache": category_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "signing_keys": token_verifier.stats(),
+        "login_latency": login_latency.snapshot(),
+        "mongo_pool": mongodb.stats(),
+        "scheduler": scheduler
+    }), 200
+
+@app.cli.command('backfill-users')
+def backfill_users_command():
+    """Preenche username_lc/email_lc dos usuários existentes e cria os índices."""
+    result = User.backfill_normalized_fields()
+    print(f"Usuários atualizados: {result['updated']}")
+
+    conflicts = {field: values for field, values in result['duplicates'].items() if values}
+    if conflicts:
+        print(f"ERRO: valores duplicados (ignorando maiúsculas) impedem os índices únicos: {conflicts}")
+        return
+
+    result = ensure_indexes(['users'])['users']
+    if result['success']:
+        set_legacy_lookup(False)
+        print("Índices de usuários criados. Reinicie os workers para desligar a busca legada (ou defina USERS_LEGACY_LOOKUP=false).")
+    else:
+        print(f"ERRO ao criar índices de usuários: {result['error']}")
+
+@app.cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Aplica todos os índices do registro (database/indexes.py)."""
+    for collection_name, result in ensure_indexes().items():
+        if result['success']:
+            print(f"{collection_name}: {', '.join(result['indexes'])}")
+        else:
+            print(f"{collection_name}: ERRO - {result['error']}")
+
+@app.cli.command('index-status')
+def index_status_command():
+    """Mostra o estado (ready/building/missing) de cada índice declarado."""
+    for item in index_status():
+        progress = f" ({item['progress']})" if item['progress'] else ""
+        print(f"{item['collection']:<15} {item['name']:<35} {item['state']}{progress}")
+
+@app.cli.command('rebuild-rollups')
+@click.option('--user', 'user_id', default=None, help='Recalcula apenas os rollups deste usuário.')
+def rebuild_rollups_command(user_id):
+    """Recalcula monthly_rollups a partir das transações."""
+    written = MonthlyRollup.rebuild(user_id)
+    print(f"Rollups gravados: {written}")
+
+@app.cli.command('verify-rollups')
+@click.option('--user', 'user_id', default=None, help='Verifica apenas os rollups deste usuário.')
+def verify_rollups_command(user_id):
+    """Compara monthly_rollups com os totais recalculados das transações."""
+    result = MonthlyRollup.verify(user_id)
+    print(f"Grupos verificados: {result['checked']}, divergências: {result['mismatch_count']}")
+    for mismatch in result['mismatches']:
+        print(f"  {mismatch}")
+    if result['mismatch_count']:
+        print("Execute rebuild-rollups para corrigir.")
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
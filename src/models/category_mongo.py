@@ -1,8 +1,50 @@
 # ARQUIVO CORRIGIDO E SEGURO: src/models/category_mongo.py
 
 from datetime import datetime
+import json
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from config import Config
 from database.mongodb import mongodb # Assumindo que a importação está correta
+from models import identity_map, ownership
+from services.category_cache import category_cache
+from services.data_version import bump_data_version
+
+# Campos que podem ser alterados em Category.update_owned
+UPDATABLE_FIELDS = ('name', 'context', 'type', 'color', 'icon', 'emoji')
+
+# Catálogo padrão criado para cada novo usuário.
+# Pode ser substituído por um arquivo JSON em Config.DEFAULT_CATEGORIES_PATH.
+DEFAULT_CATEGORIES = [
+    {'name': 'Salários', 'context': 'business', 'type': 'expense', 'color': '#DC2626', 'emoji': '💼', 'icon': 'briefcase'},
+    {'name': 'Aluguel', 'context': 'business', 'type': 'expense', 'color': '#7C2D12', 'emoji': '🏢', 'icon': 'building'},
+    {'name': 'Combustível', 'context': 'business', 'type': 'expense', 'color': '#EA580C', 'emoji': '⛽', 'icon': 'fuel'},
+    {'name': 'Impostos', 'context': 'business', 'type': 'expense', 'color': '#B91C1C', 'emoji': '📋', 'icon': 'receipt'},
+    {'name': 'Manutenção', 'context': 'business', 'type': 'expense', 'color': '#92400E', 'emoji': '🔧', 'icon': 'wrench'},
+    {'name': 'Fornecedores', 'context': 'business', 'type': 'expense', 'color': '#7C3AED', 'emoji': '🛍️', 'icon': 'shopping-cart'},
+    {'name': 'Vendas', 'context': 'business', 'type': 'income', 'color': '#059669', 'emoji': '💰', 'icon': 'dollar-sign'},
+    {'name': 'Serviços', 'context': 'business', 'type': 'income', 'color': '#0D9488', 'emoji': '🛠️', 'icon': 'wrench'},
+    {'name': 'Receitas Diversas', 'context': 'business', 'type': 'income', 'color': '#047857', 'emoji': '📈', 'icon': 'trending-up'},
+]
+
+_default_categories_cache = None
+
+def load_default_categories():
+    """Retorna o catálogo de categorias padrão (arquivo configurado ou DEFAULT_CATEGORIES)"""
+    global _default_categories_cache
+
+    if _default_categories_cache is None:
+        catalogue = DEFAULT_CATEGORIES
+        if Config.DEFAULT_CATEGORIES_PATH:
+            try:
+                with open(Config.DEFAULT_CATEGORIES_PATH, encoding='utf-8') as catalogue_file:
+                    catalogue = json.load(catalogue_file)
+            except (OSError, ValueError) as e:
+                print(f"AVISO: Catálogo de categorias inválido em {Config.DEFAULT_CATEGORIES_PATH}, usando o padrão: {e}")
+        _default_categories_cache = catalogue
+
+    return _default_categories_cache
 
 class Category:
     # 1. Adicionado user_id ao construtor
@@ -38,6 +80,12 @@ class Category:
             result = collection.insert_one(data)
             self._id = result.inserted_id
         
+        # Mantém o identity map da requisição e o cache de categorias consistentes
+        identity_map.put('category', self._id, self)
+        identity_map.clear_queries('category')
+        category_cache.invalidate(self.user_id)
+        bump_data_version(self.user_id)
+        
         return self
     
     @classmethod
@@ -46,8 +94,27 @@ class Category:
         collection = mongodb.db.categories
         query = filters or {}
         
+        key = identity_map.query_key(query)
+        cached = identity_map.get_query('category', key)
+        if cached is not None:
+            return cached
+        
+        # Consultas só por usuário (e contexto) passam pelo cache de categorias
+        cacheable = (
+            isinstance(query.get('user_id'), str)
+            and set(query) <= {'user_id', 'context'}
+            and (query.get('context') is None or isinstance(query.get('context'), str))
+        )
+        # A chave (com a versão) é lida antes da consulta e reutilizada ao gravar
+        cache_key = category_cache.key(query['user_id'], query.get('context')) if cacheable else None
+        docs = category_cache.get(cache_key) if cacheable else None
+        if docs is None:
+            docs = [dict(doc, _id=str(doc['_id'])) for doc in collection.find(query).sort('name', 1)]
+            if cacheable:
+                category_cache.set(cache_key, docs)
+        
         categories = []
-        for doc in collection.find(query).sort('name', 1):
+        for doc in docs:
             category = cls(
                 _id=str(doc['_id']),
                 user_id=doc.get('user_id'), # 3. Carregado o user_id do banco
@@ -59,13 +126,21 @@ class Category:
                 emoji=doc.get('emoji', '📁')
             )
             category.created_at = doc.get('created_at')
+            # Reaproveita a instância já carregada nesta requisição, se houver
+            category = identity_map.get('category', category._id) or category
+            identity_map.put('category', category._id, category)
             categories.append(category)
         
+        identity_map.put_query('category', key, categories)
         return categories
     
     @classmethod
     def find_by_id(cls, category_id):
         """Busca uma categoria por ID"""
+        cached = identity_map.get('category', category_id)
+        if cached is not None:
+            return cached
+        
         collection = mongodb.db.categories
         doc = None
         try:
@@ -74,28 +149,123 @@ class Category:
             doc = None
         
         if doc:
-            category = cls(
-                _id=str(doc['_id']),
-                user_id=doc.get('user_id'), # 4. Carregado o user_id do banco
-                name=doc.get('name'),
-                context=doc.get('context'),
-                type=doc.get('type'),
-                color=doc.get('color', '#3B82F6'),
-                icon=doc.get('icon', 'folder'),
-                emoji=doc.get('emoji', '📁')
-            )
-            # Preservar o user_id que está no documento do banco
-            category.user_id = doc.get('user_id')
-            category.created_at = doc.get('created_at')
+            category = cls._from_doc(doc)
+            identity_map.put('category', category._id, category)
             return category
         
         return None
     
+    @classmethod
+    def _from_doc(cls, doc):
+        """Constrói uma Category a partir de um documento do MongoDB"""
+        category = cls(
+            _id=str(doc['_id']),
+            user_id=doc.get('user_id'), # 4. Carregado o user_id do banco
+            name=doc.get('name'),
+            context=doc.get('context'),
+            type=doc.get('type'),
+            color=doc.get('color', '#3B82F6'),
+            icon=doc.get('icon', 'folder'),
+            emoji=doc.get('emoji', '📁')
+        )
+        category.created_at = doc.get('created_at')
+        return category
+    
+    @classmethod
+    def update_owned(cls, category_id, user_id, changes):
+        """Atualiza só os campos informados de uma categoria do usuário, em uma ida ao banco.
+
+        Returns:
+            tuple: (Category atualizada, None) ou (None, ownership.NOT_FOUND/FORBIDDEN)
+
+        Raises:
+            DuplicateKeyError: nome já usado pelo usuário no mesmo contexto
+        """
+        collection = mongodb.db.categories
+        object_id = ownership.object_id_or_none(category_id)
+        if object_id is None:
+            return None, ownership.NOT_FOUND
+        
+        fields = {field: value for field, value in changes.items() if field in UPDATABLE_FIELDS}
+        if not fields:
+            # Nada a alterar: apenas confirma a posse
+            doc = collection.find_one({'_id': object_id, 'user_id': user_id})
+        else:
+            doc = collection.find_one_and_update(
+                {'_id': object_id, 'user_id': user_id},
+                {'$set': fields},
+                return_document=ReturnDocument.AFTER
+            )
+        if doc is None:
+            return None, ownership.miss_reason(collection, object_id)
+        
+        category = cls._from_doc(doc)
+        identity_map.put('category', category._id, category)
+        if fields:
+            identity_map.clear_queries('category')
+            category_cache.invalidate(user_id)
+            bump_data_version(user_id)
+        return category, None
+    
+    @classmethod
+    def delete_owned(cls, category_id, user_id):
+        """Remove uma categoria do usuário em uma ida ao banco.
+
+        Returns:
+            str ou None: None se removida, senão ownership.NOT_FOUND/FORBIDDEN
+        """
+        collection = mongodb.db.categories
+        object_id = ownership.object_id_or_none(category_id)
+        if object_id is None:
+            return ownership.NOT_FOUND
+        
+        result = collection.delete_one({'_id': object_id, 'user_id': user_id})
+        if not result.deleted_count:
+            return ownership.miss_reason(collection, object_id)
+        
+        identity_map.discard('category', object_id)
+        identity_map.clear_queries('category')
+        category_cache.invalidate(user_id)
+        bump_data_version(user_id)
+        return None
+    
+    @classmethod
+    def names_by_ids(cls, category_ids, user_id=None):
+        """Resolve nomes de várias categorias em uma única consulta ($in).
+
+        Com user_id, usa as categorias do usuário (servidas pelo cache de
+        categorias quando disponível), sem consulta por lista.
+
+        Returns:
+            dict: {category_id (str): name}; IDs inválidos ou inexistentes ficam de fora
+        """
+        if user_id is not None:
+            wanted = set(category_ids)
+            return {str(cat._id): cat.name for cat in cls.find_all({'user_id': user_id}) if str(cat._id) in wanted}
+
+        object_ids = []
+        for category_id in set(category_ids):
+            try:
+                object_ids.append(ObjectId(category_id))
+            except Exception:
+                continue
+
+        if not object_ids:
+            return {}
+
+        collection = mongodb.db.categories
+        query = {'_id': {'$in': object_ids}}
+        return {str(doc['_id']): doc.get('name') for doc in collection.find(query, {'name': 1})}
+    
     def delete(self):
         """Remove a categoria do MongoDB"""
         if self._id:
             collection = mongodb.db.categories
             collection.delete_one({'_id': ObjectId(self._id)})
+            identity_map.discard('category', self._id)
+            identity_map.clear_queries('category')
+            category_cache.invalidate(self.user_id)
+            bump_data_version(self.user_id)
     
     def to_dict(self):
         """Converte a categoria para dicionário"""
@@ -113,33 +283,44 @@ class Category:
     
     @classmethod
     def seed_default_categories(cls, user_id): # 6. Modificado para aceitar um user_id
-        """Cria categorias padrão para um usuário específico se não existirem"""
+        """Cria categorias padrão para um usuário específico se não existirem.
+
+        Um único bulk upsert (uma ida ao banco, independente do tamanho do
+        catálogo). Com o índice único user_context_name_unique
+        (database/indexes.py), seeds repetidos ou concorrentes não geram duplicatas.
+        """
         collection = mongodb.db.categories
-        
-        default_categories = [
-            {'name': 'Salários', 'context': 'business', 'type': 'expense', 'color': '#DC2626', 'emoji': '💼', 'icon': 'briefcase'},
-            {'name': 'Aluguel', 'context': 'business', 'type': 'expense', 'color': '#7C2D12', 'emoji': '🏢', 'icon': 'building'},
-            {'name': 'Combustível', 'context': 'business', 'type': 'expense', 'color': '#EA580C', 'emoji': '⛽', 'icon': 'fuel'},
-            {'name': 'Impostos', 'context': 'business', 'type': 'expense', 'color': '#B91C1C', 'emoji': '📋', 'icon': 'receipt'},
-            {'name': 'Manutenção', 'context': 'business', 'type': 'expense', 'color': '#92400E', 'emoji': '🔧', 'icon': 'wrench'},
-            {'name': 'Fornecedores', 'context': 'business', 'type': 'expense', 'color': '#7C3AED', 'emoji': '🛍️', 'icon': 'shopping-cart'},
-            {'name': 'Vendas', 'context': 'business', 'type': 'income', 'color': '#059669', 'emoji': '💰', 'icon': 'dollar-sign'},
-            {'name': 'Serviços', 'context': 'business', 'type': 'income', 'color': '#0D9488', 'emoji': '🛠️', 'icon': 'wrench'},
-            {'name': 'Receitas Diversas', 'context': 'business', 'type': 'income', 'color': '#047857', 'emoji': '📈', 'icon': 'trending-up'},
-        ]
-        
-        count = 0
-        for cat_data in default_categories:
-            # Verifica se a categoria já existe PARA ESTE USUÁRIO
-            existing = collection.find_one({
+        now = datetime.utcnow()
+
+        operations = []
+        for cat_data in load_default_categories():
+            key = {
                 'user_id': user_id,
-                'name': cat_data['name'], 
-                'context': cat_data['context']
-            })
-            if not existing:
-                cat_data['user_id'] = user_id # Associa ao usuário
-                cat_data['created_at'] = datetime.utcnow()
-                collection.insert_one(cat_data)
-                count += 1
-        
-        return count
+                'context': cat_data['context'],
+                'name': cat_data['name']
+            }
+            document = {
+                'type': cat_data.get('type', 'expense'),
+                'color': cat_data.get('color', '#3B82F6'),
+                'icon': cat_data.get('icon', 'folder'),
+                'emoji': cat_data.get('emoji', '📁'),
+                'created_at': now
+            }
+            operations.append(UpdateOne(key, {'$setOnInsert': document}, upsert=True))
+
+        if not operations:
+            return 0
+
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            return result.upserted_count
+        except BulkWriteError as e:
+            # Seed concorrente: a outra requisição já inseriu a categoria
+            errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != 11000 for error in errors):
+                raise
+            return e.details.get('nUpserted', 0)
+        finally:
+            identity_map.clear_queries('category')
+            category_cache.invalidate(user_id)
+            bump_data_version(user_id)
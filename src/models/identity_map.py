@@ -0,0 +1,76 @@
+# ARQUIVO: src/models/identity_map.py
+# Identity map por requisição, guardado em flask.g.
+#
+# Dentro de uma requisição, o mesmo documento carregado mais de uma vez
+# (ex.: a transação e a sua categoria em update_transaction, ou a mesma
+# categoria consultada várias vezes na importação de documentos) é servido
+# da memória. Os modelos mantêm o mapa consistente no save()/delete().
+# Fora de um contexto de aplicação (scripts, scheduler) nada é guardado.
+
+import json
+from flask import g, has_app_context
+
+
+def _store():
+    if not has_app_context():
+        return None
+    store = getattr(g, '_identity_map', None)
+    if store is None:
+        store = g._identity_map = {'objects': {}, 'queries': {}}
+    return store
+
+
+def get(kind, object_id):
+    """Objeto já carregado nesta requisição, ou None"""
+    store = _store()
+    if store is None or object_id is None:
+        return None
+    return store['objects'].get((kind, str(object_id)))
+
+
+def put(kind, object_id, obj):
+    store = _store()
+    if store is not None and object_id is not None:
+        store['objects'][(kind, str(object_id))] = obj
+
+
+def discard(kind, object_id):
+    store = _store()
+    if store is not None and object_id is not None:
+        store['objects'].pop((kind, str(object_id)), None)
+
+
+def query_key(filters):
+    """Chave estável para um dicionário de filtros"""
+    return json.dumps(filters or {}, sort_keys=True, default=str)
+
+
+def get_query(kind, key):
+    """Resultado (lista) de uma consulta já feita nesta requisição, ou None"""
+    store = _store()
+    if store is None:
+        return None
+    result = store['queries'].get((kind, key))
+    return list(result) if result is not None else None
+
+
+def put_query(kind, key, result):
+    store = _store()
+    if store is not None:
+        store['queries'][(kind, key)] = list(result)
+
+
+def clear_queries(kind):
+    """Descarta os resultados de consultas de um tipo (após escrita)"""
+    store = _store()
+    if store is not None:
+        for cached_key in [k for k in store['queries'] if k[0] == kind]:
+            del store['queries'][cached_key]
+
+
+def discard_all(kind):
+    """Descarta todos os objetos de um tipo (após escrita em lote)"""
+    store = _store()
+    if store is not None:
+        for cached_key in [k for k in store['objects'] if k[0] == kind]:
+            del store['objects'][cached_key]
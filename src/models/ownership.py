@@ -0,0 +1,24 @@
+# ARQUIVO: src/models/ownership.py
+# Apoio às escritas restritas ao dono do documento (update_owned/delete_owned).
+#
+# A escrita usa {_id, user_id} no filtro, em uma única ida ao banco. Só quando
+# nada é encontrado uma leitura extra distingue "não existe" de "é de outro usuário".
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+
+
+def object_id_or_none(value):
+    """ObjectId do valor, ou None se ele não for um ID válido"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+def miss_reason(collection, object_id):
+    """Motivo de um filtro {_id, user_id} não ter encontrado o documento"""
+    return FORBIDDEN if collection.count_documents({'_id': object_id}, limit=1) else NOT_FOUND
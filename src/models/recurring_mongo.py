@@ -0,0 +1,312 @@
+# ARQUIVO: src/models/recurring_mongo.py
+# Modelos de transações recorrentes (coleção recurring_templates).
+#
+# Cada modelo guarda a regra (frequência e dia) e a próxima ocorrência ainda
+# não gerada (next_occurrence). process_due() busca os modelos vencidos com
+# uma varredura no índice de next_occurrence e materializa as ocorrências com
+# um único bulk upsert em transactions. Cada ocorrência tem uma chave
+# determinística (recurrence_key = "<modelo>:<AAAA-MM-DD>") protegida por um
+# índice único, então processar de novo (ou em paralelo) não gera duplicatas.
+
+from datetime import date, datetime, timedelta
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from database.mongodb import mongodb
+from models import ownership
+from models.rollup_mongo import MonthlyRollup
+from services import recurrence
+from services.data_version import bump_data_version
+
+# Limite de ocorrências geradas por modelo em uma execução (ex.: modelo semanal
+# parado há anos); o restante é gerado nas execuções seguintes
+MAX_OCCURRENCES_PER_RUN = 366
+
+# Campos que podem ser alterados em RecurringTemplate.update_owned
+UPDATABLE_FIELDS = (
+    'description', 'amount', 'category_id', 'type', 'context',
+    'recurring_frequency', 'recurring_day', 'recurring_active', 'next_occurrence', 'updated_at'
+)
+
+
+def recurrence_key(template_id, occurrence):
+    """Chave determinística de uma ocorrência de um modelo"""
+    return f'{template_id}:{occurrence.strftime("%Y-%m-%d")}'
+
+
+class RecurringTemplate:
+    COLLECTION = 'recurring_templates'
+
+    @staticmethod
+    def to_dict(doc, category_names=None):
+        """Converte o documento do modelo para dicionário"""
+        def iso(value):
+            return value.isoformat() if isinstance(value, datetime) else None
+
+        return {
+            'id': str(doc['_id']),
+            'user_id': doc.get('user_id'),
+            'description': doc.get('description'),
+            'amount': doc.get('amount'),
+            'category_id': doc.get('category_id'),
+            'category_name': (category_names or {}).get(doc.get('category_id')),
+            'type': doc.get('type'),
+            'context': doc.get('context'),
+            'recurring_frequency': doc.get('recurring_frequency'),
+            'recurring_day': doc.get('recurring_day'),
+            'recurring_active': doc.get('recurring_active', True),
+            'next_occurrence': iso(doc.get('next_occurrence')),
+            'last_generated': iso(doc.get('last_generated')),
+            'created_at': iso(doc.get('created_at')),
+            'updated_at': iso(doc.get('updated_at'))
+        }
+
+    @classmethod
+    def create(cls, data):
+        """Grava um novo modelo; next_occurrence deve vir calculado"""
+        recurrence.validate(data['recurring_frequency'], data['recurring_day'])
+        doc = dict(data)
+        doc.setdefault('recurring_active', True)
+        doc.setdefault('created_at', datetime.utcnow())
+        doc.setdefault('last_generated', None)
+        result = mongodb.db[cls.COLLECTION].insert_one(doc)
+        return result.inserted_id
+
+    @classmethod
+    def create_from_transaction(cls, transaction):
+        """Modelo mensal a partir de uma transação com is_recurring/recurring_day.
+
+        A própria transação é a ocorrência atual; a próxima é a primeira
+        depois da data dela ou de hoje (a que for maior), então uma transação
+        retroativa não gera os meses já passados. Há no máximo um modelo por
+        transação de origem (user_id, source_transaction_id): chamar de novo
+        devolve o modelo existente.
+        """
+        day = int(transaction.recurring_day)
+        recurrence.validate('monthly', day)
+        start = max((transaction.date or datetime.utcnow()).date(), date.today()) + timedelta(days=1)
+        now = datetime.utcnow()
+        key = {'user_id': transaction.user_id, 'source_transaction_id': str(transaction._id)}
+        doc = {
+            'description': transaction.description,
+            'amount': transaction.amount,
+            'category_id': transaction.category_id,
+            'type': transaction.type,
+            'context': transaction.context,
+            'recurring_frequency': 'monthly',
+            'recurring_day': day,
+            'recurring_active': True,
+            'next_occurrence': recurrence.to_datetime(recurrence.first_on_or_after('monthly', day, start)),
+            'created_at': now,
+            'last_generated': None
+        }
+
+        collection = mongodb.db[cls.COLLECTION]
+        try:
+            template = collection.find_one_and_update(
+                key,
+                {'$setOnInsert': doc},
+                upsert=True,
+                projection={'_id': 1},
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Upsert concorrente da mesma transação: o outro criou o modelo
+            template = collection.find_one(key, {'_id': 1})
+        return template['_id']
+
+    @classmethod
+    def find_for_user(cls, user_id, context=None, active_only=True):
+        query = {'user_id': user_id}
+        if context:
+            query['context'] = context
+        if active_only:
+            query['recurring_active'] = True
+        return list(mongodb.db[cls.COLLECTION].find(query).sort('next_occurrence', 1))
+
+    @classmethod
+    def find_owned(cls, template_id, user_id):
+        """Documento do modelo do usuário, ou (None, motivo)"""
+        collection = mongodb.db[cls.COLLECTION]
+        object_id = ownership.object_id_or_none(template_id)
+        if object_id is None:
+            return None, ownership.NOT_FOUND
+        doc = collection.find_one({'_id': object_id, 'user_id': user_id})
+        if doc is None:
+            return None, ownership.miss_reason(collection, object_id)
+        return doc, None
+
+    @classmethod
+    def update_owned(cls, template_id, user_id, changes):
+        """$set dos campos informados em um modelo do usuário, em uma ida ao banco"""
+        collection = mongodb.db[cls.COLLECTION]
+        object_id = ownership.object_id_or_none(template_id)
+        if object_id is None:
+            return None, ownership.NOT_FOUND
+
+        fields = {field: value for field, value in changes.items() if field in UPDATABLE_FIELDS}
+        doc = collection.find_one_and_update(
+            {'_id': object_id, 'user_id': user_id},
+            {'$set': fields},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            return None, ownership.miss_reason(collection, object_id)
+        return doc, None
+
+    @classmethod
+    def toggle_owned(cls, template_id, user_id):
+        """Inverte recurring_active com um update em pipeline (sem leitura prévia)"""
+        collection = mongodb.db[cls.COLLECTION]
+        object_id = ownership.object_id_or_none(template_id)
+        if object_id is None:
+            return None, ownership.NOT_FOUND
+
+        doc = collection.find_one_and_update(
+            {'_id': object_id, 'user_id': user_id},
+            [{'$set': {
+                'recurring_active': {'$not': [{'$ifNull': ['$recurring_active', True]}]},
+                'updated_at': '$$NOW'
+            }}],
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            return None, ownership.miss_reason(collection, object_id)
+
+        if doc['recurring_active']:
+            # Reativado: não gera o que venceu enquanto estava inativo
+            next_occurrence = recurrence.to_datetime(recurrence.first_on_or_after(
+                doc['recurring_frequency'], doc['recurring_day'], date.today()
+            ))
+            if doc.get('next_occurrence') is None or doc['next_occurrence'] < next_occurrence:
+                collection.update_one({'_id': object_id}, {'$set': {'next_occurrence': next_occurrence}})
+                doc['next_occurrence'] = next_occurrence
+        return doc, None
+
+    @classmethod
+    def delete_owned(cls, template_id, user_id):
+        """Remove o modelo; as transações já geradas são mantidas"""
+        collection = mongodb.db[cls.COLLECTION]
+        object_id = ownership.object_id_or_none(template_id)
+        if object_id is None:
+            return ownership.NOT_FOUND
+        result = collection.delete_one({'_id': object_id, 'user_id': user_id})
+        if not result.deleted_count:
+            return ownership.miss_reason(collection, object_id)
+        return None
+
+    # --- Materialização ---
+
+    @staticmethod
+    def _occurrence_document(template, occurrence, now):
+        return {
+            'user_id': template['user_id'],
+            'description': template.get('description'),
+            'amount': template.get('amount'),
+            'type': template.get('type'),
+            'context': template.get('context'),
+            'category_id': template.get('category_id'),
+            'date': occurrence,
+            'due_date': occurrence,
+            'status': 'pending',
+            'is_recurring': True,
+            'recurring_day': template.get('recurring_day'),
+            'recurring_template_id': str(template['_id']),
+            'created_at': now,
+            'updated_at': now
+        }
+
+    @classmethod
+    def due_templates(cls, until, user_id=None, limit=None, after=None):
+        """Modelos ativos com ocorrência vencida até `until` (varredura no índice).
+
+        A ordem (next_occurrence, _id) segue o índice active_next_occurrence,
+        sem ordenação em memória. `after` é o par (next_occurrence, _id) do
+        último modelo do lote anterior (paginação por keyset).
+        """
+        query = {'recurring_active': True, 'next_occurrence': {'$lte': until}}
+        if user_id:
+            query['user_id'] = user_id
+        if after is not None:
+            last_occurrence, last_id = after
+            query['$or'] = [
+                {'next_occurrence': {'$gt': last_occurrence}},
+                {'next_occurrence': last_occurrence, '_id': {'$gt': last_id}}
+            ]
+        cursor = mongodb.db[cls.COLLECTION].find(query).sort([('next_occurrence', 1), ('_id', 1)])
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor)
+
+    @classmethod
+    def materialize(cls, templates, until):
+        """Gera as ocorrências vencidas dos modelos com um bulk upsert.
+
+        Returns:
+            list: Ocorrências criadas nesta execução ({transaction_id, template_id, date})
+        """
+        now = datetime.utcnow()
+        until_date = until.date() if isinstance(until, datetime) else until
+
+        upserts = []
+        documents = []
+        advances = []
+        for template in templates:
+            frequency, day = template['recurring_frequency'], template['recurring_day']
+            current = template['next_occurrence'].date()
+            generated = 0
+            while current <= until_date and generated < MAX_OCCURRENCES_PER_RUN:
+                occurrence = recurrence.to_datetime(current)
+                doc = cls._occurrence_document(template, occurrence, now)
+                upserts.append(UpdateOne(
+                    {'recurrence_key': recurrence_key(template['_id'], occurrence)},
+                    {'$setOnInsert': doc},
+                    upsert=True
+                ))
+                documents.append(doc)
+                current = recurrence.next_after(frequency, day, current)
+                generated += 1
+
+            # Avança só se ninguém avançou antes (execuções concorrentes)
+            advances.append(UpdateOne(
+                {'_id': template['_id'], 'next_occurrence': template['next_occurrence']},
+                {'$set': {'next_occurrence': recurrence.to_datetime(current), 'last_generated': now}}
+            ))
+
+        if not upserts:
+            return []
+
+        upserted = {}
+        try:
+            result = mongodb.db.transactions.bulk_write(upserts, ordered=False)
+            upserted = result.upserted_ids
+        except BulkWriteError as e:
+            # Upsert concorrente da mesma chave: a outra execução já criou a ocorrência
+            errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != 11000 for error in errors):
+                raise
+            upserted = {item['index']: item['_id'] for item in e.details.get('upserted', [])}
+
+        if advances:
+            mongodb.db[cls.COLLECTION].bulk_write(advances, ordered=False)
+
+        created = [dict(documents[index], _id=object_id) for index, object_id in upserted.items()]
+        if created:
+            MonthlyRollup.apply(created)
+            for user_id in {doc['user_id'] for doc in created}:
+                bump_data_version(user_id)
+
+        return [
+            {
+                'transaction_id': str(doc['_id']),
+                'template_id': doc['recurring_template_id'],
+                'date': doc['date'].isoformat()
+            }
+            for doc in created
+        ]
+
+    @classmethod
+    def process_due(cls, user_id=None, until=None):
+        """Materializa todas as ocorrências vencidas (de um usuário ou de todos)"""
+        until = until or recurrence.to_datetime(date.today())
+        templates = cls.due_templates(until, user_id=user_id)
+        return cls.materialize(templates, until)
@@ -0,0 +1,287 @@
+# ARQUIVO: src/models/rollup_mongo.py
+# Totais mensais pré-calculados por usuário, contexto, mês, tipo e categoria.
+#
+# Mantidos de forma incremental ($inc) em Transaction.save()/delete() e nas
+# importações em lote. "flask --app src.main rebuild-rollups" recalcula tudo a
+# partir das transações e "flask --app src.main verify-rollups" aponta divergências.
+
+from datetime import datetime
+from pymongo import ReplaceOne, UpdateOne
+from database.indexes import INDEXES
+from database.mongodb import mongodb
+
+# Diferenças menores que isto são atribuídas a arredondamento de ponto flutuante
+AMOUNT_TOLERANCE = 0.005
+
+# Conversão do amount no servidor equivalente a amount_value(): valores não
+# numéricos ou ausentes contam como 0, strings numéricas são convertidas
+AMOUNT_EXPRESSION = {'$convert': {'input': '$amount', 'to': 'double', 'onError': 0.0, 'onNull': 0.0}}
+
+
+def amount_value(value):
+    """Valor numérico do amount de uma transação, como nos rollups recalculados"""
+    try:
+        return float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class MonthlyRollup:
+    COLLECTION = 'monthly_rollups'
+
+    @staticmethod
+    def _key(doc):
+        """Chave do rollup de uma transação, ou None se ela não entra nos totais"""
+        if not doc or not doc.get('user_id') or not isinstance(doc.get('date'), datetime):
+            return None
+        return (
+            doc['user_id'],
+            doc.get('context'),
+            doc['date'].year,
+            doc['date'].month,
+            doc.get('type'),
+            doc.get('category_id')
+        )
+
+    @staticmethod
+    def _rollup_id(key):
+        user_id, context, year, month, type_, category_id = key
+        return f'{user_id}|{context}|{year:04d}-{month:02d}|{type_}|{category_id}'
+
+    @staticmethod
+    def _fields(key):
+        user_id, context, year, month, type_, category_id = key
+        return {
+            'user_id': user_id,
+            'context': context,
+            'year': year,
+            'month': month,
+            'type': type_,
+            'category_id': category_id
+        }
+
+    @classmethod
+    def _add(cls, deltas, doc, sign):
+        key = cls._key(doc)
+        if key is None:
+            return
+        total, count = deltas.get(key, (0.0, 0))
+        deltas[key] = (total + sign * amount_value(doc.get('amount')), count + sign)
+
+    @classmethod
+    def _write(cls, deltas):
+        operations = []
+        now = datetime.utcnow()
+        for key, (total, count) in deltas.items():
+            if total == 0 and count == 0:
+                continue
+            operations.append(UpdateOne(
+                {'_id': cls._rollup_id(key)},
+                {
+                    '$inc': {'total': total, 'count': count},
+                    '$set': {'updated_at': now},
+                    '$setOnInsert': cls._fields(key)
+                },
+                upsert=True
+            ))
+        if operations:
+            mongodb.db[cls.COLLECTION].bulk_write(operations, ordered=False)
+
+    @classmethod
+    def apply(cls, docs, sign=1):
+        """Soma (sign=1) ou subtrai (sign=-1) um conjunto de transações dos rollups"""
+        deltas = {}
+        for doc in docs:
+            cls._add(deltas, doc, sign)
+        cls._apply_deltas(deltas)
+
+    @classmethod
+    def apply_change(cls, before, after):
+        """Aplica a troca de uma versão da transação por outra (None = inexistente)"""
+        deltas = {}
+        cls._add(deltas, before, -1)
+        cls._add(deltas, after, 1)
+        cls._apply_deltas(deltas)
+
+    @classmethod
+    def apply_grouped(cls, groups, sign=1):
+        """Aplica deltas já agregados: itens com as chaves do rollup, total e count"""
+        deltas = {}
+        for group in groups:
+            if not isinstance(group.get('year'), int):
+                continue
+            key = (group['user_id'], group.get('context'), group['year'], group['month'],
+                   group.get('type'), group.get('category_id'))
+            total, count = deltas.get(key, (0.0, 0))
+            deltas[key] = (total + sign * amount_value(group.get('total')), count + sign * group.get('count', 0))
+        cls._apply_deltas(deltas)
+
+    @classmethod
+    def _apply_deltas(cls, deltas):
+        # A escrita da transação já foi feita: uma falha aqui não deve desfazê-la.
+        # Divergências são detectadas por verify-rollups e corrigidas por rebuild-rollups.
+        try:
+            cls._write(deltas)
+        except Exception as e:
+            print(f"Erro ao atualizar rollups mensais: {e}")
+
+    # --- Leitura ---
+
+    @classmethod
+    def month_totals(cls, user_id, context, year, month):
+        """Totais do mês por tipo: {'income': {'total', 'count'}, 'expense': {...}}"""
+        totals = {}
+        query = {'user_id': user_id, 'context': context, 'year': year, 'month': month}
+        for doc in mongodb.db[cls.COLLECTION].find(query, {'type': 1, 'total': 1, 'count': 1}):
+            item = totals.setdefault(doc.get('type'), {'total': 0.0, 'count': 0})
+            item['total'] += doc.get('total', 0)
+            item['count'] += doc.get('count', 0)
+        return totals
+
+    @classmethod
+    def year_summary(cls, user_id, context, year):
+        """Totais de cada mês do ano, por tipo e por categoria"""
+        months = {}
+        query = {'user_id': user_id, 'context': context, 'year': year}
+        for doc in mongodb.db[cls.COLLECTION].find(query).sort('month', 1):
+            month = months.setdefault(doc['month'], {'month': doc['month'], 'income': 0.0, 'expense': 0.0,
+                                                     'count': 0, 'by_category': []})
+            if doc.get('type') in ('income', 'expense'):
+                month[doc['type']] += doc.get('total', 0)
+            month['count'] += doc.get('count', 0)
+            month['by_category'].append({
+                'category_id': doc.get('category_id'),
+                'type': doc.get('type'),
+                'total': round(doc.get('total', 0), 2),
+                'count': doc.get('count', 0)
+            })
+
+        for month in months.values():
+            month['income'] = round(month['income'], 2)
+            month['expense'] = round(month['expense'], 2)
+            month['balance'] = round(month['income'] - month['expense'], 2)
+        return list(months.values())
+
+    # --- Manutenção ---
+
+    @classmethod
+    def groups(cls, match):
+        """Totais das transações do filtro agrupados pelas chaves do rollup
+        (agregação no servidor). Formato aceito por apply_grouped."""
+        pipeline = [
+            {'$match': {'$and': [match, {'date': {'$type': 'date'}, 'user_id': {'$ne': None}}]}},
+            {'$group': {
+                '_id': {
+                    'user_id': '$user_id',
+                    'context': '$context',
+                    'year': {'$year': '$date'},
+                    'month': {'$month': '$date'},
+                    'type': '$type',
+                    'category_id': '$category_id'
+                },
+                'total': {'$sum': AMOUNT_EXPRESSION},
+                'count': {'$sum': 1}
+            }}
+        ]
+        for group in mongodb.db.transactions.aggregate(pipeline, allowDiskUse=True):
+            yield dict(group['_id'], total=float(group['total'] or 0), count=group['count'])
+
+    @classmethod
+    def _computed(cls, user_id=None):
+        """Rollups calculados diretamente das transações"""
+        for group in cls.groups({'user_id': user_id} if user_id else {}):
+            key = (group['user_id'], group.get('context'), group['year'], group['month'],
+                   group.get('type'), group.get('category_id'))
+            yield key, group['total'], group['count']
+
+    @classmethod
+    def rebuild(cls, user_id=None, batch_size=1000):
+        """Recalcula os rollups (de um usuário ou de todos) a partir das transações.
+
+        Nunca há um intervalo com rollups apagados: a reconstrução completa é
+        feita em uma coleção temporária que substitui a atual com um rename
+        atômico; a de um usuário substitui cada grupo (ReplaceOne com upsert)
+        e só então remove os grupos que deixaram de existir. Incrementos ($inc)
+        feitos por escritas concorrentes durante a reconstrução podem se perder;
+        execute verify-rollups depois, com o tráfego baixo.
+        """
+        if user_id:
+            return cls._rebuild_user(user_id, batch_size)
+        return cls._rebuild_all(batch_size)
+
+    @classmethod
+    def _rebuild_all(cls, batch_size):
+        temporary = mongodb.db[f'{cls.COLLECTION}_rebuild']
+        temporary.drop()
+        # Os índices são criados antes: o rename leva os da coleção de origem
+        temporary.create_indexes(INDEXES[cls.COLLECTION])
+
+        now = datetime.utcnow()
+        written = 0
+        batch = []
+        for key, total, count in cls._computed():
+            batch.append(dict(cls._fields(key), _id=cls._rollup_id(key), total=total, count=count, updated_at=now))
+            if len(batch) >= batch_size:
+                temporary.insert_many(batch, ordered=False)
+                written += len(batch)
+                batch = []
+        if batch:
+            temporary.insert_many(batch, ordered=False)
+            written += len(batch)
+
+        temporary.rename(cls.COLLECTION, dropTarget=True)
+        return written
+
+    @classmethod
+    def _rebuild_user(cls, user_id, batch_size):
+        collection = mongodb.db[cls.COLLECTION]
+        now = datetime.utcnow()
+        written = 0
+        seen_ids = []
+        operations = []
+        for key, total, count in cls._computed(user_id):
+            rollup_id = cls._rollup_id(key)
+            seen_ids.append(rollup_id)
+            document = dict(cls._fields(key), total=total, count=count, updated_at=now)
+            operations.append(ReplaceOne({'_id': rollup_id}, document, upsert=True))
+            if len(operations) >= batch_size:
+                collection.bulk_write(operations, ordered=False)
+                written += len(operations)
+                operations = []
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+
+        collection.delete_many({'user_id': user_id, '_id': {'$nin': seen_ids}})
+        return written
+
+    @classmethod
+    def verify(cls, user_id=None, max_report=50):
+        """Compara os rollups armazenados com os valores recalculados"""
+        stored = {
+            doc['_id']: doc
+            for doc in mongodb.db[cls.COLLECTION].find({'user_id': user_id} if user_id else {})
+        }
+
+        mismatches = []
+        checked = 0
+        for key, total, count in cls._computed(user_id):
+            checked += 1
+            rollup_id = cls._rollup_id(key)
+            doc = stored.pop(rollup_id, None)
+            if doc is None:
+                mismatches.append({'id': rollup_id, 'problem': 'missing', 'expected_total': total, 'expected_count': count})
+            elif doc.get('count') != count or abs(doc.get('total', 0) - total) > AMOUNT_TOLERANCE:
+                mismatches.append({'id': rollup_id, 'problem': 'different', 'expected_total': total,
+                                   'expected_count': count, 'total': doc.get('total'), 'count': doc.get('count')})
+
+        # Sobras: rollups sem transações correspondentes (devem estar zerados)
+        for rollup_id, doc in stored.items():
+            if doc.get('count', 0) != 0 or abs(doc.get('total', 0)) > AMOUNT_TOLERANCE:
+                mismatches.append({'id': rollup_id, 'problem': 'extra', 'total': doc.get('total'), 'count': doc.get('count')})
+
+        return {
+            'checked': checked,
+            'mismatch_count': len(mismatches),
+            'mismatches': mismatches[:max_report]
+        }
@@ -1,9 +1,108 @@
 # ARQUIVO CORRIGIDO E SEGURO: src/models/transaction_mongo.py
 
+import base64
+import json
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from config import Config
 from database.mongodb import mongodb
 from models.category_mongo import Category
+from models.rollup_mongo import MonthlyRollup
+from models.recurring_mongo import RecurringTemplate
+from models import identity_map, ownership
+from services.data_version import bump_data_version
+
+# Ordenação estável das listagens: _id desempata transações com a mesma data
+DEFAULT_SORT = [('date', -1), ('_id', -1)]
+
+# Campos que podem ser alterados em lote (Transaction.bulk_update)
+BULK_UPDATE_FIELDS = ('status', 'category_id')
+
+# Status possíveis de uma transação
+STATUSES = ('pending', 'paid', 'overdue')
+
+# Campos que podem ser alterados em Transaction.update_owned
+UPDATABLE_FIELDS = ('description', 'amount', 'type', 'context', 'category_id', 'status', 'date', 'due_date')
+
+def encode_cursor(doc):
+    """Cursor opaco que aponta para depois de `doc` na ordenação (date, _id)"""
+    date_value = doc.get('date')
+    payload = {
+        'd': date_value.isoformat() if isinstance(date_value, datetime) else None,
+        'i': str(doc['_id'])
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decodifica um cursor gerado por encode_cursor; ValueError se inválido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_date = datetime.fromisoformat(payload['d']) if payload.get('d') else None
+        return last_date, ObjectId(payload['i'])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError('Cursor de paginação inválido')
+
+def encode_search_cursor(doc):
+    """Cursor opaco da busca textual: aponta para depois de `doc` na ordenação (score, _id)"""
+    payload = {'s': doc['_score'], 'i': str(doc['_id'])}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_search_cursor(cursor):
+    """Decodifica um cursor gerado por encode_search_cursor; ValueError se inválido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(payload['s']), ObjectId(payload['i'])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError('Cursor de paginação inválido')
+
+class TransactionRow:
+    """Linha leve de uma consulta com projeção: expõe só os campos pedidos.
+
+    Acessar um campo que não foi projetado gera AttributeError, para que a
+    falta de um campo na projeção não passe despercebida como None.
+    """
+    __slots__ = ('_data', '_fields')
+
+    # Campos que podem ser pedidos em uma projeção
+    FIELDS = (
+        'user_id', 'description', 'amount', 'type', 'context', 'category_id', 'date',
+        'due_date', 'status', 'is_recurring', 'recurring_day', 'created_at', 'updated_at'
+    )
+
+    def __init__(self, doc, fields):
+        self._data = doc
+        self._fields = frozenset(fields)
+
+    @classmethod
+    def projection(cls, fields):
+        """Projeção do MongoDB para os campos pedidos (_id sempre incluído)"""
+        invalid = [field for field in fields if field not in cls.FIELDS]
+        if invalid:
+            raise ValueError(f"Campos inválidos na projeção: {', '.join(invalid)}")
+        return {field: 1 for field in fields}
+
+    def __getattr__(self, name):
+        if name == 'id':
+            return str(self._data['_id'])
+        if name in self._fields:
+            # Campo projetado (None se ausente no documento)
+            return self._data.get(name)
+        raise AttributeError(f"Campo '{name}' não incluído na projeção")
+
+    def to_dict(self):
+        """Converte para dicionário apenas com os campos projetados"""
+        result = {'id': str(self._data['_id'])}
+        for key, value in self._data.items():
+            if key == '_id':
+                continue
+            result[key] = value.isoformat() if hasattr(value, 'isoformat') else value
+        return result
+
 
 class Transaction:
     def __init__(self, description=None, amount=None, type=None, context=None, 
@@ -24,11 +123,9 @@ class Transaction:
         self.created_at = datetime.utcnow()
         self.updated_at = datetime.utcnow()
     
-    def save(self):
-        """Salva a transação no MongoDB"""
-        collection = mongodb.db.transactions
-        
-        data = {
+    def _document(self):
+        """Campos persistidos da transação"""
+        return {
             'user_id': self.user_id,  # CORREÇÃO: Incluído user_id nos dados salvos
             'description': self.description,
             'amount': self.amount,
@@ -43,74 +140,341 @@ class Transaction:
             'created_at': self.created_at,
             'updated_at': self.updated_at
         }
+    
+    def save(self):
+        """Salva a transação no MongoDB"""
+        collection = mongodb.db.transactions
+        data = self._document()
         
         if self._id:
             data['updated_at'] = datetime.utcnow()
-            collection.update_one({'_id': ObjectId(self._id)}, {'$set': data})
+            # A versão anterior vem na mesma ida ao banco para calcular o delta dos rollups
+            before = collection.find_one_and_update(
+                {'_id': ObjectId(self._id)}, {'$set': data}, return_document=ReturnDocument.BEFORE
+            )
+            if before:
+                MonthlyRollup.apply_change(before, data)
         else:
             result = collection.insert_one(data)
             self._id = result.inserted_id
+            MonthlyRollup.apply_change(None, data)
+        
+        # Mantém o identity map da requisição e o cache de respostas consistentes
+        identity_map.put('transaction', self._id, self)
+        bump_data_version(self.user_id)
         
         return self
     
     @classmethod
-    def find_all(cls, filters=None, limit=None):
-        """Busca todas as transações com filtros e limite opcionais"""
+    def _from_doc(cls, doc):
+        """Constrói uma Transaction a partir de um documento do MongoDB"""
+        transaction = cls(
+            _id=str(doc['_id']),
+            user_id=doc.get('user_id'),  # CORREÇÃO: Carregado user_id do banco
+            description=doc.get('description'),
+            amount=doc.get('amount'),
+            type=doc.get('type'),
+            context=doc.get('context'),
+            category_id=doc.get('category_id'),
+            date=doc.get('date'),
+            due_date=doc.get('due_date'),
+            status=doc.get('status'),
+            is_recurring=doc.get('is_recurring'),
+            recurring_day=doc.get('recurring_day')
+        )
+        transaction.created_at = doc.get('created_at')
+        transaction.updated_at = doc.get('updated_at')
+        return transaction
+
+    @classmethod
+    def find_all(cls, filters=None, limit=None, fields=None):
+        """Busca todas as transações com filtros e limite opcionais.
+
+        Com `fields`, apenas esses campos são lidos do banco e o retorno é uma
+        lista de TransactionRow (sem construir objetos Transaction completos).
+        """
         collection = mongodb.db.transactions
         query = filters or {}
+        projection = TransactionRow.projection(fields) if fields else None
         
         # Constrói a busca com ordenação
-        cursor = collection.find(query).sort('date', -1)
+        cursor = collection.find(query, projection).sort(DEFAULT_SORT)
         
         # Aplica o limite SE ele for fornecido
         if limit is not None:
             cursor = cursor.limit(limit)
-            
-        transactions = []
-        for doc in cursor:
-            transaction = cls(
-                _id=str(doc['_id']),
-                user_id=doc.get('user_id'),  # CORREÇÃO: Carregado user_id do banco
-                description=doc.get('description'),
-                amount=doc.get('amount'),
-                type=doc.get('type'),
-                context=doc.get('context'),
-                category_id=doc.get('category_id'),
-                date=doc.get('date'),
-                due_date=doc.get('due_date'),
-                status=doc.get('status'),
-                is_recurring=doc.get('is_recurring'),
-                recurring_day=doc.get('recurring_day')
-            )
-            transaction.created_at = doc.get('created_at')
-            transaction.updated_at = doc.get('updated_at')
-            transactions.append(transaction)
         
-        return transactions
+        if fields:
+            return [TransactionRow(doc, fields) for doc in cursor]
+            
+        return [cls._from_doc(doc) for doc in cursor]
+
+    @classmethod
+    def iter_all(cls, filters=None, limit=None, batch_size=500):
+        """Itera as transações direto do cursor, sem montar a lista inteira em memória"""
+        collection = mongodb.db.transactions
+        cursor = collection.find(filters or {}).sort(DEFAULT_SORT).batch_size(batch_size)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+
+        try:
+            for doc in cursor:
+                yield cls._from_doc(doc)
+        finally:
+            cursor.close()
+
+    @classmethod
+    def iter_dicts(cls, filters=None, limit=None, batch_size=500, user_id=None):
+        """Itera as transações já convertidas em dicionário, resolvendo as
+        categorias com uma consulta por lote de `batch_size` transações"""
+        batch = []
+        for transaction in cls.iter_all(filters, limit=limit, batch_size=batch_size):
+            batch.append(transaction)
+            if len(batch) >= batch_size:
+                yield from cls.to_dict_many(batch, user_id=user_id)
+                batch = []
+        if batch:
+            yield from cls.to_dict_many(batch, user_id=user_id)
+
+    @classmethod
+    def find_page(cls, filters=None, page_size=50, cursor=None):
+        """Paginação por cursor (keyset) na ordenação (date desc, _id desc).
+
+        Cada página é uma busca indexada a partir da última linha da página
+        anterior, com custo constante independente da profundidade.
+
+        Returns:
+            tuple: (lista de Transaction, next_cursor ou None na última página)
+        """
+        collection = mongodb.db.transactions
+        query = filters or {}
+
+        if cursor:
+            last_date, last_id = decode_cursor(cursor)
+            if last_date is None:
+                # Datas nulas ficam no fim da ordenação descendente
+                keyset = {'date': None, '_id': {'$lt': last_id}}
+            else:
+                keyset = {'$or': [
+                    {'date': {'$lt': last_date}},
+                    {'date': last_date, '_id': {'$lt': last_id}},
+                    {'date': None}
+                ]}
+            query = {'$and': [query, keyset]} if query else keyset
+
+        # Uma linha a mais indica se existe próxima página
+        docs = list(collection.find(query).sort(DEFAULT_SORT).limit(page_size + 1))
+        has_more = len(docs) > page_size
+        docs = docs[:page_size]
+
+        next_cursor = encode_cursor(docs[-1]) if has_more and docs else None
+        return [cls._from_doc(doc) for doc in docs], next_cursor
+
+    @classmethod
+    def search(cls, user_id, term, filters=None, page_size=50, cursor=None):
+        """Busca textual na descrição, ordenada por relevância.
+
+        Usa o índice de texto (user_id, description) em português
+        (database/indexes.py): sem distinção de maiúsculas e acentos, com
+        radicalização (ex.: "mercado" encontra "Mercados"). A paginação é por
+        cursor na ordenação (score desc, _id desc).
+
+        Returns:
+            tuple: (lista de Transaction, next_cursor ou None na última página)
+        """
+        collection = mongodb.db.transactions
+        match = dict(filters or {}, user_id=user_id)
+        match['$text'] = {'$search': term, '$language': 'portuguese'}
+
+        pipeline = [
+            {'$match': match},
+            {'$addFields': {'_score': {'$meta': 'textScore'}}}
+        ]
+        if cursor:
+            last_score, last_id = decode_search_cursor(cursor)
+            pipeline.append({'$match': {'$or': [
+                {'_score': {'$lt': last_score}},
+                {'_score': last_score, '_id': {'$lt': last_id}}
+            ]}})
+        # Uma linha a mais indica se existe próxima página
+        pipeline += [
+            {'$sort': {'_score': -1, '_id': -1}},
+            {'$limit': page_size + 1}
+        ]
+
+        docs = list(collection.aggregate(pipeline))
+        has_more = len(docs) > page_size
+        docs = docs[:page_size]
+
+        next_cursor = encode_search_cursor(docs[-1]) if has_more and docs else None
+        return [cls._from_doc(doc) for doc in docs], next_cursor
+
+    @classmethod
+    def search_all(cls, user_id, term, filters=None, limit=None):
+        """Busca textual sem paginação (lista simples), em uma única agregação.
+
+        Mesma ordenação de search() (score desc, _id desc); `limit` é aplicado
+        no servidor quando informado.
+        """
+        collection = mongodb.db.transactions
+        match = dict(filters or {}, user_id=user_id)
+        match['$text'] = {'$search': term, '$language': 'portuguese'}
+
+        pipeline = [
+            {'$match': match},
+            {'$sort': {'_score': {'$meta': 'textScore'}, '_id': -1}}
+        ]
+        if limit:
+            pipeline.append({'$limit': limit})
+        return [cls._from_doc(doc) for doc in collection.aggregate(pipeline)]
+
+    @staticmethod
+    def owned_query(user_id, ids=None, filters=None):
+        """Filtro de uma operação em lote, sempre restrito ao usuário.
+
+        Args:
+            ids: Lista de IDs das transações (ValueError se algum for inválido)
+            filters: Filtros adicionais do MongoDB (ex.: context, status, date)
+        """
+        query = dict(filters or {}, user_id=user_id)
+        if ids is not None:
+            try:
+                query['_id'] = {'$in': [ObjectId(transaction_id) for transaction_id in ids]}
+            except (InvalidId, TypeError):
+                raise ValueError('ID de transação inválido')
+        return query
+
+    @classmethod
+    def bulk_update(cls, user_id, changes, ids=None, filters=None):
+        """Aplica status e/ou category_id às transações do usuário com um único update_many.
+
+        Returns:
+            dict: matched e modified (contagens do MongoDB)
+        """
+        collection = mongodb.db.transactions
+        query = cls.owned_query(user_id, ids, filters)
+        changes = {field: value for field, value in changes.items() if field in BULK_UPDATE_FIELDS}
+        if not changes:
+            raise ValueError('Nenhuma alteração informada')
+
+        # A recategorização move valores entre rollups: os totais afetados são
+        # agregados antes da escrita e aplicados como deltas depois
+        groups = list(MonthlyRollup.groups(query)) if 'category_id' in changes else []
+
+        result = collection.update_many(query, {'$set': dict(changes, updated_at=datetime.utcnow())})
+
+        if groups:
+            MonthlyRollup.apply_grouped(groups, -1)
+            MonthlyRollup.apply_grouped([dict(group, category_id=changes['category_id']) for group in groups], 1)
+        if result.modified_count:
+            identity_map.discard_all('transaction')
+            bump_data_version(user_id)
+
+        return {'matched': result.matched_count, 'modified': result.modified_count}
+
+    @classmethod
+    def bulk_delete(cls, user_id, ids=None, filters=None):
+        """Remove as transações do usuário com um único delete_many.
+
+        Returns:
+            dict: matched (selecionadas e do usuário) e deleted
+        """
+        collection = mongodb.db.transactions
+        query = cls.owned_query(user_id, ids, filters)
+
+        matched = collection.count_documents(query)
+        groups = list(MonthlyRollup.groups(query)) if matched else []
+        result = collection.delete_many(query) if matched else None
+        deleted = result.deleted_count if result else 0
+
+        if groups:
+            MonthlyRollup.apply_grouped(groups, -1)
+        if deleted:
+            identity_map.discard_all('transaction')
+            bump_data_version(user_id)
+
+        return {'matched': matched, 'deleted': deleted}
+
+    @classmethod
+    def dashboard_summary(cls, user_id, context, year, month):
+        """Totais do mês e pendências do usuário em uma única agregação ($facet).
+
+        O $match inicial seleciona só as transações do mês ou pendentes, usando
+        os índices (user_id, context, date) e (user_id, context, status, ...);
+        as somas e contagens são feitas no servidor.
+
+        Com Config.DASHBOARD_USE_ROLLUPS, os totais do mês vêm de monthly_rollups
+        e a agregação fica restrita às pendências.
+        """
+        if Config.DASHBOARD_USE_ROLLUPS:
+            return cls._dashboard_summary_from_rollups(user_id, context, year, month)
+
+        collection = mongodb.db.transactions
+        start_date = datetime(year, month, 1)
+        end_date = datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1)
+        in_month = {'date': {'$gte': start_date, '$lt': end_date}}
+        pending = {'status': 'pending', 'type': {'$in': ['income', 'expense']}}
+
+        pipeline = [
+            {'$match': {'user_id': user_id, 'context': context, '$or': [in_month, pending]}},
+            {'$facet': {
+                'month': [
+                    {'$match': in_month},
+                    {'$group': {'_id': '$type', 'total': {'$sum': '$amount'}}}
+                ],
+                'pending': [
+                    {'$match': pending},
+                    {'$group': {'_id': '$type', 'count': {'$sum': 1}}}
+                ]
+            }}
+        ]
+        result = next(collection.aggregate(pipeline), {'month': [], 'pending': []})
+
+        totals = {item['_id']: item['total'] for item in result['month']}
+        pending_counts = {item['_id']: item['count'] for item in result['pending']}
+        return {
+            'total_income': totals.get('income', 0),
+            'total_expenses': totals.get('expense', 0),
+            'pending_payments': pending_counts.get('expense', 0),
+            'upcoming_receivables': pending_counts.get('income', 0)
+        }
+
+    @classmethod
+    def _dashboard_summary_from_rollups(cls, user_id, context, year, month):
+        totals = MonthlyRollup.month_totals(user_id, context, year, month)
+        pipeline = [
+            {'$match': {'user_id': user_id, 'context': context, 'status': 'pending',
+                        'type': {'$in': ['income', 'expense']}}},
+            {'$group': {'_id': '$type', 'count': {'$sum': 1}}}
+        ]
+        pending_counts = {item['_id']: item['count'] for item in mongodb.db.transactions.aggregate(pipeline)}
+        return {
+            'total_income': totals.get('income', {}).get('total', 0),
+            'total_expenses': totals.get('expense', {}).get('total', 0),
+            'pending_payments': pending_counts.get('expense', 0),
+            'upcoming_receivables': pending_counts.get('income', 0)
+        }
+
+    @classmethod
+    def count(cls, filters=None, limit=None):
+        """Conta as transações que atendem aos filtros sem trazer documentos"""
+        collection = mongodb.db.transactions
+        options = {'limit': limit} if limit else {}
+        return collection.count_documents(filters or {}, **options)
     
     @classmethod
     def find_by_id(cls, transaction_id):
         """Busca uma transação por ID"""
+        cached = identity_map.get('transaction', transaction_id)
+        if cached is not None:
+            return cached
+        
         collection = mongodb.db.transactions
         doc = collection.find_one({'_id': ObjectId(transaction_id)})
         
         if doc:
-            transaction = cls(
-                _id=str(doc['_id']),
-                user_id=doc.get('user_id'),  # CORREÇÃO: Carregado user_id do banco
-                description=doc.get('description'),
-                amount=doc.get('amount'),
-                type=doc.get('type'),
-                context=doc.get('context'),
-                category_id=doc.get('category_id'),
-                date=doc.get('date'),
-                due_date=doc.get('due_date'),
-                status=doc.get('status'),
-                is_recurring=doc.get('is_recurring'),
-                recurring_day=doc.get('recurring_day')
-            )
-            transaction.created_at = doc.get('created_at')
-            transaction.updated_at = doc.get('updated_at')
+            transaction = cls._from_doc(doc)
+            identity_map.put('transaction', transaction._id, transaction)
             return transaction
         
         return None
@@ -119,15 +483,82 @@ class Transaction:
         """Remove a transação do MongoDB"""
         if self._id:
             collection = mongodb.db.transactions
-            collection.delete_one({'_id': ObjectId(self._id)})
+            doc = collection.find_one_and_delete({'_id': ObjectId(self._id)})
+            if doc:
+                MonthlyRollup.apply_change(doc, None)
+            identity_map.discard('transaction', self._id)
+            bump_data_version(self.user_id)
     
-    def to_dict(self):
-        """Converte a transação para dicionário"""
+    @classmethod
+    def update_owned(cls, transaction_id, user_id, changes):
+        """Atualiza só os campos informados de uma transação do usuário, em uma ida ao banco.
+
+        O find_one_and_update devolve a versão anterior (usada nos deltas dos
+        rollups); a nova versão é ela com o $set aplicado.
+
+        Returns:
+            tuple: (Transaction atualizada, None) ou (None, ownership.NOT_FOUND/FORBIDDEN)
+        """
+        collection = mongodb.db.transactions
+        object_id = ownership.object_id_or_none(transaction_id)
+        if object_id is None:
+            return None, ownership.NOT_FOUND
+
+        fields = {field: value for field, value in changes.items() if field in UPDATABLE_FIELDS}
+        fields['updated_at'] = datetime.utcnow()
+
+        before = collection.find_one_and_update(
+            {'_id': object_id, 'user_id': user_id},
+            {'$set': fields},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None, ownership.miss_reason(collection, object_id)
+
+        after = dict(before, **fields)
+        MonthlyRollup.apply_change(before, after)
+
+        transaction = cls._from_doc(after)
+        identity_map.put('transaction', transaction._id, transaction)
+        bump_data_version(user_id)
+        return transaction, None
+
+    @classmethod
+    def delete_owned(cls, transaction_id, user_id):
+        """Remove uma transação do usuário em uma ida ao banco.
+
+        Returns:
+            str ou None: None se removida, senão ownership.NOT_FOUND/FORBIDDEN
+        """
+        collection = mongodb.db.transactions
+        object_id = ownership.object_id_or_none(transaction_id)
+        if object_id is None:
+            return ownership.NOT_FOUND
+
+        doc = collection.find_one_and_delete({'_id': object_id, 'user_id': user_id})
+        if doc is None:
+            return ownership.miss_reason(collection, object_id)
+
+        MonthlyRollup.apply_change(doc, None)
+        identity_map.discard('transaction', object_id)
+        bump_data_version(user_id)
+        return None
+    
+    def to_dict(self, category_names=None):
+        """Converte a transação para dicionário.
+
+        Args:
+            category_names: Mapa {category_id: nome} já resolvido (ver to_dict_many).
+                Se omitido, a categoria é buscada individualmente.
+        """
         category_name = None
         if self.category_id:
-            category = Category.find_by_id(self.category_id)
-            if category:
-                category_name = category.name
+            if category_names is not None:
+                category_name = category_names.get(self.category_id)
+            else:
+                category = Category.find_by_id(self.category_id)
+                if category:
+                    category_name = category.name
         
         def safe_date_format(date_obj):
             if date_obj is None:
@@ -157,40 +588,60 @@ class Transaction:
             'updated_at': safe_date_format(self.updated_at)
         }
 
+    @classmethod
+    def to_dict_many(cls, transactions, user_id=None):
+        """Converte uma lista de transações resolvendo todas as categorias
+        em uma única consulta, em vez de uma consulta por transação"""
+        category_ids = [t.category_id for t in transactions if t.category_id]
+        category_names = Category.names_by_ids(category_ids, user_id=user_id)
+        return [t.to_dict(category_names) for t in transactions]
+
     # CORREÇÃO: Método auxiliar para criar transações com validação
+    @classmethod
+    def _missing_field(cls, transaction_data):
+        """Primeiro campo obrigatório ausente, ou None"""
+        required_fields = ['description', 'amount', 'type', 'context', 'user_id']
+        for field in required_fields:
+            if field not in transaction_data or transaction_data[field] is None:
+                return field
+        return None
+    
+    @classmethod
+    def _build(cls, transaction_data):
+        """Monta a transação (sem salvar) a partir de dados já validados"""
+        # Converter data se necessário
+        transaction_date = transaction_data.get('date')
+        if isinstance(transaction_date, str):
+            transaction_date = datetime.strptime(transaction_date, '%Y-%m-%d')
+        
+        due_date = transaction_data.get('due_date')
+        if due_date and isinstance(due_date, str):
+            due_date = datetime.strptime(due_date, '%Y-%m-%d')
+        
+        return cls(
+            user_id=transaction_data['user_id'],
+            description=transaction_data['description'],
+            amount=float(transaction_data['amount']),
+            type=transaction_data['type'],
+            context=transaction_data['context'],
+            category_id=transaction_data.get('category_id'),
+            date=transaction_date or datetime.utcnow(),
+            due_date=due_date,
+            status=transaction_data.get('status', 'pending'),
+            is_recurring=transaction_data.get('is_recurring', False),
+            recurring_day=transaction_data.get('recurring_day')
+        )
+    
     @classmethod
     def create_transaction(cls, transaction_data):
         """Método auxiliar para criar transações com validação"""
         try:
             # Validar campos obrigatórios
-            required_fields = ['description', 'amount', 'type', 'context', 'user_id']
-            for field in required_fields:
-                if field not in transaction_data or transaction_data[field] is None:
-                    return {'success': False, 'error': f'Campo obrigatório ausente: {field}'}
-            
-            # Converter data se necessário
-            transaction_date = transaction_data.get('date')
-            if isinstance(transaction_date, str):
-                transaction_date = datetime.strptime(transaction_date, '%Y-%m-%d')
+            missing = cls._missing_field(transaction_data)
+            if missing:
+                return {'success': False, 'error': f'Campo obrigatório ausente: {missing}'}
             
-            due_date = transaction_data.get('due_date')
-            if due_date and isinstance(due_date, str):
-                due_date = datetime.strptime(due_date, '%Y-%m-%d')
-            
-            # Criar nova transação
-            transaction = cls(
-                user_id=transaction_data['user_id'],
-                description=transaction_data['description'],
-                amount=float(transaction_data['amount']),
-                type=transaction_data['type'],
-                context=transaction_data['context'],
-                category_id=transaction_data.get('category_id'),
-                date=transaction_date or datetime.utcnow(),
-                due_date=due_date,
-                status=transaction_data.get('status', 'pending'),
-                is_recurring=transaction_data.get('is_recurring', False),
-                recurring_day=transaction_data.get('recurring_day')
-            )
+            transaction = cls._build(transaction_data)
             
             # Salvar no banco
             transaction.save()
@@ -206,3 +657,147 @@ class Transaction:
                 'success': False,
                 'error': f'Erro ao criar transação: {str(e)}'
             }
+
+    @classmethod
+    def bulk_create(cls, rows, batch_size=500):
+        """Cria várias transações com insert_many(ordered=False) em lotes.
+
+        Cada linha é validada como em create_transaction; linhas inválidas ou
+        rejeitadas pelo banco não impedem as demais. Os rollups mensais e a
+        versão de dados dos usuários são atualizados uma vez por chamada.
+
+        Returns:
+            dict: saved ([{index, transaction_id}]) e errors ([{index, error}]),
+                com `index` referente à posição em `rows`
+        """
+        collection = mongodb.db.transactions
+        saved = []
+        errors = []
+        inserted_docs = []
+
+        def flush(batch):
+            if not batch:
+                return
+            rejected = {}
+            try:
+                collection.insert_many([doc for _, doc in batch], ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get('writeErrors', []):
+                    rejected[error['index']] = error.get('errmsg', 'Erro desconhecido ao salvar')
+            # O _id é gerado no cliente antes do envio, então cada documento já o tem
+            for position, (index, doc) in enumerate(batch):
+                if position in rejected:
+                    errors.append({'index': index, 'error': f'Erro ao criar transação: {rejected[position]}'})
+                else:
+                    saved.append({'index': index, 'transaction_id': str(doc['_id'])})
+                    inserted_docs.append(doc)
+
+        batch = []
+        try:
+            for index, transaction_data in enumerate(rows):
+                missing = cls._missing_field(transaction_data)
+                if missing:
+                    errors.append({'index': index, 'error': f'Campo obrigatório ausente: {missing}'})
+                    continue
+                try:
+                    doc = cls._build(transaction_data)._document()
+                except Exception as e:
+                    errors.append({'index': index, 'error': f'Erro ao criar transação: {str(e)}'})
+                    continue
+
+                batch.append((index, doc))
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            flush(batch)
+        finally:
+            # Mesmo após uma falha no meio, os lotes já gravados entram nos rollups
+            if inserted_docs:
+                MonthlyRollup.apply(inserted_docs)
+                for user_id in {doc['user_id'] for doc in inserted_docs}:
+                    bump_data_version(user_id)
+
+        errors.sort(key=lambda error: error['index'])
+        return {'saved': saved, 'errors': errors}
+
+    # --- Transações recorrentes (modelos em recurring_templates, ver models/recurring_mongo.py) ---
+
+    @staticmethod
+    def _recurring_error(reason):
+        if reason == ownership.FORBIDDEN:
+            return {'success': False, 'error': 'Permissão negada', 'reason': reason}
+        return {'success': False, 'error': 'Transação recorrente não encontrada', 'reason': reason}
+
+    @classmethod
+    def create_recurring_transaction(cls, transaction_data):
+        """Cria um modelo de transação recorrente"""
+        try:
+            template_id = RecurringTemplate.create(transaction_data)
+            return {'success': True, 'transaction_id': str(template_id)}
+        except Exception as e:
+            return {'success': False, 'error': f'Erro ao criar transação recorrente: {str(e)}'}
+
+    @classmethod
+    def get_recurring_transactions(cls, user_id, context=None, active_only=True):
+        """Lista os modelos recorrentes do usuário, com o nome da categoria"""
+        try:
+            docs = RecurringTemplate.find_for_user(user_id, context=context, active_only=active_only)
+            category_names = Category.names_by_ids(
+                [doc.get('category_id') for doc in docs if doc.get('category_id')], user_id=user_id
+            )
+            return {
+                'success': True,
+                'transactions': [RecurringTemplate.to_dict(doc, category_names) for doc in docs]
+            }
+        except Exception as e:
+            return {'success': False, 'error': f'Erro ao buscar transações recorrentes: {str(e)}'}
+
+    @classmethod
+    def get_recurring_transaction_by_id(cls, template_id, user_id):
+        doc, reason = RecurringTemplate.find_owned(template_id, user_id)
+        if doc is None:
+            return cls._recurring_error(reason)
+        return {'success': True, 'transaction': RecurringTemplate.to_dict(doc)}
+
+    @classmethod
+    def update_recurring_transaction(cls, template_id, user_id, update_data):
+        try:
+            doc, reason = RecurringTemplate.update_owned(template_id, user_id, update_data)
+            if doc is None:
+                return cls._recurring_error(reason)
+            return {'success': True, 'transaction': RecurringTemplate.to_dict(doc)}
+        except Exception as e:
+            return {'success': False, 'error': f'Erro ao atualizar transação recorrente: {str(e)}'}
+
+    @classmethod
+    def delete_recurring_transaction(cls, template_id, user_id):
+        try:
+            reason = RecurringTemplate.delete_owned(template_id, user_id)
+            if reason:
+                return cls._recurring_error(reason)
+            return {'success': True}
+        except Exception as e:
+            return {'success': False, 'error': f'Erro ao deletar transação recorrente: {str(e)}'}
+
+    @classmethod
+    def toggle_recurring_transaction(cls, template_id, user_id):
+        try:
+            doc, reason = RecurringTemplate.toggle_owned(template_id, user_id)
+            if doc is None:
+                return cls._recurring_error(reason)
+            return {'success': True, 'active': doc['recurring_active']}
+        except Exception as e:
+            return {'success': False, 'error': f'Erro ao alternar transação recorrente: {str(e)}'}
+
+    @classmethod
+    def process_recurring_transactions(cls, user_id):
+        """Gera as ocorrências vencidas dos modelos do usuário (idempotente)"""
+        try:
+            generated = RecurringTemplate.process_due(user_id=user_id)
+            return {
+                'success': True,
+                'processed_count': len(generated),
+                'generated_transactions': generated
+            }
+        except Exception as e:
+            return {'success': False, 'error': f'Erro ao processar transações recorrentes: {str(e)}'}
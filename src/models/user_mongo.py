@@ -1,8 +1,66 @@
 # ARQUIVO: src/models/user_mongo.py (MODIFICADO PARA INTEGRAR COM FIREBASE)
 
+import re
 from datetime import datetime
 from bson import ObjectId
-from src.database.mongodb import mongodb
+from pymongo import UpdateOne
+from config import Config
+from database.mongodb import mongodb
+
+def normalize_lookup(value):
+    """Normaliza username/email para comparação case-insensitive via índice."""
+    return value.lower() if isinstance(value, str) else None
+
+# Modo legado da busca (usuários sem username_lc/email_lc), decidido uma vez
+# por processo: Config.USERS_LEGACY_LOOKUP ('true'/'false') ou, em 'auto',
+# uma única contagem na inicialização (detect_legacy_users). None = não decidido.
+_legacy_lookup = None
+
+def detect_legacy_users():
+    """Decide (uma vez por processo) se a busca antiga por regex fica ativa"""
+    global _legacy_lookup
+    setting = Config.USERS_LEGACY_LOOKUP
+    if setting in ('true', 'false'):
+        _legacy_lookup = setting == 'true'
+    else:
+        _legacy_lookup = bool(mongodb.db.users.count_documents(
+            {'$or': [{'username_lc': {'$exists': False}}, {'email_lc': {'$exists': False}}]}, limit=1
+        ))
+    return _legacy_lookup
+
+def set_legacy_lookup(enabled):
+    """Liga/desliga o modo legado neste processo (ex.: após o backfill-users)"""
+    global _legacy_lookup
+    _legacy_lookup = bool(enabled)
+
+def _find_by_normalized(field, value):
+    """Busca pelo campo normalizado (<field>_lc, índice único).
+
+    No modo legado (antes do "flask backfill-users"), documentos ainda sem o
+    campo são encontrados pela busca case-insensitive antiga, restrita a
+    eles, e recebem o campo normalizado na hora. Fora dele um miss é só o
+    miss do índice.
+    """
+    collection = mongodb.db.users
+    normalized = normalize_lookup(value)
+    if normalized is None:
+        return None
+
+    doc = collection.find_one({f'{field}_lc': normalized})
+    legacy = _legacy_lookup if _legacy_lookup is not None else detect_legacy_users()
+    if doc or not legacy:
+        return doc
+
+    doc = collection.find_one({
+        f'{field}_lc': {'$exists': False},
+        field: {'$regex': f'^{re.escape(value)}$', '$options': 'i'}
+    })
+    if doc:
+        collection.update_one({'_id': doc['_id']}, {'$set': {
+            'username_lc': normalize_lookup(doc.get('username')),
+            'email_lc': normalize_lookup(doc.get('email'))
+        }})
+    return doc
 
 class User:
     def __init__(self, uid=None, username=None, email=None, display_name=None, role='user', _id=None):
@@ -22,7 +80,9 @@ class User:
         data = {
             'uid': self.uid,
             'username': self.username,
+            'username_lc': normalize_lookup(self.username),  # Chave de busca indexada
             'email': self.email,
+            'email_lc': normalize_lookup(self.email),  # Chave de busca indexada
             'display_name': self.display_name,
             'role': self.role,
             'updated_at': datetime.utcnow()
@@ -67,9 +127,8 @@ class User:
     @classmethod
     def find_by_username(cls, username):
         """Busca um usuário pelo nome de usuário (case-insensitive)."""
-        collection = mongodb.db.users
-        # A flag 'i' no regex torna a busca case-insensitive
-        doc = collection.find_one({'username': {'$regex': f'^{username}$', '$options': 'i'}})
+        # Busca exata no campo normalizado (índice único), sem regex
+        doc = _find_by_normalized('username', username)
         
         if doc:
             return cls(
@@ -85,8 +144,7 @@ class User:
     @classmethod
     def find_by_email(cls, email):
         """Busca um usuário pelo email (case-insensitive)."""
-        collection = mongodb.db.users
-        doc = collection.find_one({'email': {'$regex': f'^{email}$', '$options': 'i'}})
+        doc = _find_by_normalized('email', email)
         
         if doc:
             return cls(
@@ -99,6 +157,44 @@ class User:
             )
         return None
 
+    @classmethod
+    def backfill_normalized_fields(cls, batch_size=500):
+        """Migração: preenche username_lc/email_lc dos usuários existentes.
+
+        Retorna o número de documentos atualizados e os valores que colidem
+        ignorando maiúsculas/minúsculas (impedem a criação dos índices únicos
+        declarados em database/indexes.py).
+        """
+        collection = mongodb.db.users
+        query = {'$or': [
+            {'username_lc': {'$exists': False}},
+            {'email_lc': {'$exists': False}}
+        ]}
+
+        updated = 0
+        operations = []
+        for doc in collection.find(query, {'username': 1, 'email': 1}):
+            operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {
+                'username_lc': normalize_lookup(doc.get('username')),
+                'email_lc': normalize_lookup(doc.get('email'))
+            }}))
+            if len(operations) >= batch_size:
+                updated += collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+
+        duplicates = {}
+        for field in ('username_lc', 'email_lc'):
+            pipeline = [
+                {'$match': {field: {'$type': 'string'}}},
+                {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}},
+                {'$match': {'count': {'$gt': 1}}}
+            ]
+            duplicates[field] = [item['_id'] for item in collection.aggregate(pipeline)]
+
+        return {'updated': updated, 'duplicates': duplicates}
+
     def to_dict(self):
         """Converte o usuário para dicionário, sem informações sensíveis."""
         return {
@@ -1,13 +1,19 @@
 # ARQUIVO CORRIGIDO E SEGURO: src/routes/categories.py
 
 from flask import Blueprint, request, jsonify
-from models.category_mongo import Category
+from models.category_mongo import Category, UPDATABLE_FIELDS
+from models import ownership
+from pymongo.errors import DuplicateKeyError
 from auth import verify_token # <-- 1. Importar o decorator de verificação
+from services.response_cache import cached_response
+from services.etag import conditional_get
 
 categories_bp = Blueprint('categories', __name__)
 
 @categories_bp.route('/categories', methods=['GET'])
 @verify_token # <-- 2. Proteger a rota
+@conditional_get('categories')
+@cached_response('categories')
 def get_categories(current_user_uid): # <-- 3. Receber o UID do usuário
     """Busca apenas as categorias do usuário logado."""
     try:
@@ -42,6 +48,8 @@ def create_category(current_user_uid): # <-- 6. Receber o UID
         
         category.save()
         return jsonify(category.to_dict()), 201
+    except DuplicateKeyError:
+        return jsonify({'error': 'Já existe uma categoria com este nome neste contexto'}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -50,25 +58,19 @@ def create_category(current_user_uid): # <-- 6. Receber o UID
 def update_category(current_user_uid, category_id): # <-- 9. Receber ambos os argumentos
     """Atualiza uma categoria, verificando se ela pertence ao usuário logado."""
     try:
-        category = Category.find_by_id(category_id)
-        if not category:
-            return jsonify({'error': 'Category not found'}), 404
+        data = request.get_json() or {}
+        changes = {field: data[field] for field in UPDATABLE_FIELDS if field in data}
         
-        # 10. VERIFICAÇÃO DE SEGURANÇA CRUCIAL
-        if category.user_id != current_user_uid:
+        # 10. VERIFICAÇÃO DE SEGURANÇA CRUCIAL: o filtro da escrita inclui o user_id
+        category, error = Category.update_owned(category_id, current_user_uid, changes)
+        if error == ownership.NOT_FOUND:
+            return jsonify({'error': 'Category not found'}), 404
+        if error == ownership.FORBIDDEN:
             return jsonify({'error': 'Permission denied'}), 403 # Proibido
         
-        data = request.get_json()
-        
-        category.name = data.get('name', category.name)
-        category.context = data.get('context', category.context)
-        category.type = data.get('type', category.type)
-        category.color = data.get('color', category.color)
-        category.icon = data.get('icon', category.icon)
-        category.emoji = data.get('emoji', category.emoji)
-        category.save()
-        
         return jsonify(category.to_dict())
+    except DuplicateKeyError:
+        return jsonify({'error': 'Já existe uma categoria com este nome neste contexto'}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -77,15 +79,13 @@ def update_category(current_user_uid, category_id): # <-- 9. Receber ambos os ar
 def delete_category(current_user_uid, category_id): # <-- 12. Receber ambos
     """Deleta uma categoria, verificando se ela pertence ao usuário logado."""
     try:
-        category = Category.find_by_id(category_id)
-        if not category:
+        # 13. VERIFICAÇÃO DE SEGURANÇA CRUCIAL: o filtro da remoção inclui o user_id
+        error = Category.delete_owned(category_id, current_user_uid)
+        if error == ownership.NOT_FOUND:
             return jsonify({'error': 'Category not found'}), 404
-        
-        # 13. VERIFICAÇÃO DE SEGURANÇA CRUCIAL
-        if category.user_id != current_user_uid:
+        if error == ownership.FORBIDDEN:
             return jsonify({'error': 'Permission denied'}), 403 # Proibido
         
-        category.delete()
         return jsonify({'message': 'Category deleted successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
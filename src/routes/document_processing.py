@@ -183,14 +183,10 @@ def process_document(current_user_uid):
             # Auto-salvamento (agora todas as transações têm category_id)
             if auto_save and processed_transactions:
                 try:
-                    transaction_model = Transaction()
-                    saved_count = 0
-                    
-                    for transaction_data in processed_transactions:
-                        if transaction_data.get('category_id'):  # Agora todas devem ter
-                            save_result = transaction_model.create_transaction(transaction_data)
-                            if save_result.get('success', False):
-                                saved_count += 1
+                    # Agora todas devem ter category_id; gravação em lote (insert_many)
+                    rows = [t for t in processed_transactions if t.get('category_id')]
+                    save_result = Transaction.bulk_create(rows)
+                    saved_count = len(save_result['saved'])
                     
                     response_data['auto_saved'] = True
                     response_data['saved_count'] = saved_count
@@ -233,9 +229,10 @@ def save_extracted_transactions(current_user_uid):
         
         print(f"Tentando salvar {len(transactions)} transações")
         
-        transaction_model = Transaction()
         saved_transactions = []
         errors = []
+        valid_rows = []
+        valid_indexes = []
         
         for i, transaction_data in enumerate(transactions):
             try:
@@ -255,19 +252,8 @@ def save_extracted_transactions(current_user_uid):
                     })
                     continue
                 
-                result = transaction_model.create_transaction(transaction_data)
-                if result.get('success', False):
-                    saved_transactions.append({
-                        'index': i,
-                        'transaction_id': result.get('transaction_id')
-                    })
-                    print(f"Transação {i} salva com sucesso")
-                else:
-                    errors.append({
-                        'index': i,
-                        'error': result.get('error', 'Erro desconhecido ao salvar')
-                    })
-                    print(f"Erro ao salvar transação {i}: {result.get('error')}")
+                valid_rows.append(transaction_data)
+                valid_indexes.append(i)
                     
             except Exception as transaction_error:
                 errors.append({
@@ -276,6 +262,23 @@ def save_extracted_transactions(current_user_uid):
                 })
                 print(f"Erro na transação {i}: {str(transaction_error)}")
         
+        # Gravação em lote (insert_many); os índices são mapeados de volta para a lista recebida
+        result = Transaction.bulk_create(valid_rows)
+        for item in result['saved']:
+            saved_transactions.append({
+                'index': valid_indexes[item['index']],
+                'transaction_id': item['transaction_id']
+            })
+        for item in result['errors']:
+            errors.append({
+                'index': valid_indexes[item['index']],
+                'error': item['error']
+            })
+            print(f"Erro ao salvar transação {valid_indexes[item['index']]}: {item['error']}")
+        errors.sort(key=lambda error: error['index'])
+        
+        print(f"{len(saved_transactions)} transações salvas, {len(errors)} erros")
+        
         return jsonify({
             'success': True,
             'saved_count': len(saved_transactions),
@@ -1,18 +1,26 @@
 from flask import Blueprint, request, jsonify
-from src.auth import verify_token
-from src.models.transaction_mongo import Transaction
-from datetime import datetime, timedelta
-import calendar
+from auth import verify_token
+from models.transaction_mongo import Transaction
+from models import ownership
+from services import recurrence
+from datetime import datetime, date, timedelta
 
 recurring_bp = Blueprint('recurring', __name__)
 
+def recurring_error_response(result):
+    """Resposta de erro de uma operação em transação recorrente"""
+    if result.get('reason') == ownership.NOT_FOUND:
+        return jsonify({'error': result['error']}), 404
+    if result.get('reason') == ownership.FORBIDDEN:
+        return jsonify({'error': result['error']}), 403
+    return jsonify({'error': result['error']}), 500
+
 @recurring_bp.route('/recurring/transactions', methods=['POST'])
 @verify_token
-def create_recurring_transaction():
+def create_recurring_transaction(current_user_uid):
     """Criar uma nova transação recorrente"""
     try:
         data = request.json
-        user_data = request.user
         
         # Validações
         required_fields = ['description', 'amount', 'category_id', 'type', 'context', 'recurring_frequency']
@@ -20,28 +28,30 @@ def create_recurring_transaction():
             if field not in data:
                 return jsonify({'error': f'Campo {field} é obrigatório'}), 400
         
-        # Criar transação recorrente
+        frequency = data['recurring_frequency']  # 'weekly', 'monthly', 'yearly'
+        day = int(data.get('recurring_day', 1))
+        try:
+            next_occurrence = calculate_next_occurrence(frequency, day)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Criar modelo da transação recorrente
         transaction_data = {
             'description': data['description'],
             'amount': float(data['amount']),
-            'category_id': int(data['category_id']),
+            'category_id': str(data['category_id']),
             'type': data['type'],
             'context': data['context'],
-            'user_id': user_data['uid'],
-            'recurring': True,
-            'recurring_frequency': data['recurring_frequency'],  # 'weekly', 'monthly', 'yearly'
-            'recurring_day': int(data.get('recurring_day', 1)),
+            'user_id': current_user_uid,
+            'recurring_frequency': frequency,
+            'recurring_day': day,
             'recurring_active': True,
-            'next_occurrence': calculate_next_occurrence(
-                data['recurring_frequency'], 
-                int(data.get('recurring_day', 1))
-            ),
+            'next_occurrence': next_occurrence,
             'created_at': datetime.utcnow(),
             'last_generated': None
         }
         
-        transaction = Transaction()
-        result = transaction.create_recurring_transaction(transaction_data)
+        result = Transaction.create_recurring_transaction(transaction_data)
         
         if result['success']:
             return jsonify({
@@ -57,16 +67,14 @@ def create_recurring_transaction():
 
 @recurring_bp.route('/recurring/transactions', methods=['GET'])
 @verify_token
-def get_recurring_transactions():
+def get_recurring_transactions(current_user_uid):
     """Listar transações recorrentes do usuário"""
     try:
-        user_data = request.user
         context = request.args.get('context')
         active_only = request.args.get('active_only', 'true').lower() == 'true'
         
-        transaction = Transaction()
-        result = transaction.get_recurring_transactions(
-            user_id=user_data['uid'],
+        result = Transaction.get_recurring_transactions(
+            user_id=current_user_uid,
             context=context,
             active_only=active_only
         )
@@ -81,11 +89,10 @@ def get_recurring_transactions():
 
 @recurring_bp.route('/recurring/transactions/<transaction_id>', methods=['PUT'])
 @verify_token
-def update_recurring_transaction(transaction_id):
+def update_recurring_transaction(current_user_uid, transaction_id):
     """Atualizar transação recorrente"""
     try:
         data = request.json
-        user_data = request.user
         
         # Campos que podem ser atualizados
         update_data = {}
@@ -98,8 +105,10 @@ def update_recurring_transaction(transaction_id):
             if field in data:
                 if field == 'amount':
                     update_data[field] = float(data[field])
-                elif field == 'category_id' or field == 'recurring_day':
+                elif field == 'recurring_day':
                     update_data[field] = int(data[field])
+                elif field == 'category_id':
+                    update_data[field] = str(data[field])
                 else:
                     update_data[field] = data[field]
         
@@ -109,19 +118,21 @@ def update_recurring_transaction(transaction_id):
             day = update_data.get('recurring_day')
             
             # Se não foram fornecidos, buscar os valores atuais
-            if not frequency or not day:
-                transaction = Transaction()
-                current = transaction.get_recurring_transaction_by_id(transaction_id)
-                if current['success']:
-                    frequency = frequency or current['transaction']['recurring_frequency']
-                    day = day or current['transaction']['recurring_day']
+            if not frequency or day is None:
+                current = Transaction.get_recurring_transaction_by_id(transaction_id, current_user_uid)
+                if not current['success']:
+                    return recurring_error_response(current)
+                frequency = frequency or current['transaction']['recurring_frequency']
+                day = day if day is not None else current['transaction']['recurring_day']
             
-            update_data['next_occurrence'] = calculate_next_occurrence(frequency, day)
+            try:
+                update_data['next_occurrence'] = calculate_next_occurrence(frequency, day)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
         update_data['updated_at'] = datetime.utcnow()
         
-        transaction = Transaction()
-        result = transaction.update_recurring_transaction(transaction_id, user_data['uid'], update_data)
+        result = Transaction.update_recurring_transaction(transaction_id, current_user_uid, update_data)
         
         if result['success']:
             return jsonify({
@@ -129,20 +140,17 @@ def update_recurring_transaction(transaction_id):
                 'message': 'Transação recorrente atualizada com sucesso'
             }), 200
         else:
-            return jsonify({'error': result['error']}), 500
+            return recurring_error_response(result)
             
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @recurring_bp.route('/recurring/transactions/<transaction_id>', methods=['DELETE'])
 @verify_token
-def delete_recurring_transaction(transaction_id):
+def delete_recurring_transaction(current_user_uid, transaction_id):
     """Deletar transação recorrente"""
     try:
-        user_data = request.user
-        
-        transaction = Transaction()
-        result = transaction.delete_recurring_transaction(transaction_id, user_data['uid'])
+        result = Transaction.delete_recurring_transaction(transaction_id, current_user_uid)
         
         if result['success']:
             return jsonify({
@@ -150,20 +158,17 @@ def delete_recurring_transaction(transaction_id):
                 'message': 'Transação recorrente deletada com sucesso'
             }), 200
         else:
-            return jsonify({'error': result['error']}), 500
+            return recurring_error_response(result)
             
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @recurring_bp.route('/recurring/transactions/<transaction_id>/toggle', methods=['POST'])
 @verify_token
-def toggle_recurring_transaction(transaction_id):
+def toggle_recurring_transaction(current_user_uid, transaction_id):
     """Ativar/desativar transação recorrente"""
     try:
-        user_data = request.user
-        
-        transaction = Transaction()
-        result = transaction.toggle_recurring_transaction(transaction_id, user_data['uid'])
+        result = Transaction.toggle_recurring_transaction(transaction_id, current_user_uid)
         
         if result['success']:
             return jsonify({
@@ -172,20 +177,17 @@ def toggle_recurring_transaction(transaction_id):
                 'active': result['active']
             }), 200
         else:
-            return jsonify({'error': result['error']}), 500
+            return recurring_error_response(result)
             
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 @recurring_bp.route('/recurring/process', methods=['POST'])
 @verify_token
-def process_recurring_transactions():
+def process_recurring_transactions(current_user_uid):
     """Processar transações recorrentes (gerar transações para datas vencidas)"""
     try:
-        user_data = request.user
-        
-        transaction = Transaction()
-        result = transaction.process_recurring_transactions(user_data['uid'])
+        result = Transaction.process_recurring_transactions(current_user_uid)
         
         if result['success']:
             return jsonify({
@@ -200,115 +202,69 @@ def process_recurring_transactions():
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+# Tamanho padrão e máximo de uma página do cronograma
+PREVIEW_PAGE_SIZE = 50
+PREVIEW_MAX_PAGE_SIZE = 1000
+
 @recurring_bp.route('/recurring/preview', methods=['POST'])
 def preview_recurring_schedule():
-    """Visualizar cronograma de uma transação recorrente"""
+    """Visualizar cronograma de uma transação recorrente (paginado)"""
     try:
         data = request.json
         frequency = data.get('recurring_frequency')
         day = int(data.get('recurring_day', 1))
         months_ahead = int(data.get('months_ahead', 12))
+        offset = max(int(data.get('offset', 0)), 0)
+        limit = min(max(int(data.get('limit', PREVIEW_PAGE_SIZE)), 1), PREVIEW_MAX_PAGE_SIZE)
         
         if not frequency:
             return jsonify({'error': 'Frequência é obrigatória'}), 400
         
-        schedule = generate_recurring_schedule(frequency, day, months_ahead)
+        try:
+            schedule, total = generate_recurring_schedule(frequency, day, months_ahead, offset, limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'success': True,
             'schedule': schedule,
-            'total_occurrences': len(schedule)
+            'total_occurrences': total,
+            'offset': offset,
+            'limit': limit,
+            'has_more': offset + len(schedule) < total
         }), 200
         
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
 def calculate_next_occurrence(frequency, day):
-    """Calcular próxima ocorrência de uma transação recorrente"""
-    now = datetime.now()
-    
-    if frequency == 'weekly':
-        # day representa o dia da semana (0=segunda, 6=domingo)
-        days_ahead = day - now.weekday()
-        if days_ahead <= 0:  # Se já passou esta semana
-            days_ahead += 7
-        return now + timedelta(days=days_ahead)
-    
-    elif frequency == 'monthly':
-        # day representa o dia do mês
-        try:
-            if now.day <= day:
-                # Ainda não passou este mês
-                next_date = now.replace(day=day)
-            else:
-                # Já passou este mês, ir para o próximo
-                if now.month == 12:
-                    next_date = now.replace(year=now.year + 1, month=1, day=day)
-                else:
-                    next_date = now.replace(month=now.month + 1, day=day)
-            
-            return next_date
-        except ValueError:
-            # Dia não existe no mês (ex: 31 de fevereiro)
-            # Usar último dia do mês
-            if now.month == 12:
-                next_month = 1
-                next_year = now.year + 1
-            else:
-                next_month = now.month + 1
-                next_year = now.year
-            
-            last_day = calendar.monthrange(next_year, next_month)[1]
-            return datetime(next_year, next_month, min(day, last_day))
-    
-    elif frequency == 'yearly':
-        # day representa o dia do ano (1-365)
-        start_of_year = datetime(now.year, 1, 1)
-        target_date = start_of_year + timedelta(days=day - 1)
-        
-        if target_date <= now:
-            # Já passou este ano
-            start_of_next_year = datetime(now.year + 1, 1, 1)
-            target_date = start_of_next_year + timedelta(days=day - 1)
-        
-        return target_date
-    
-    return now + timedelta(days=30)  # Fallback
+    """Calcular próxima ocorrência (estritamente depois de hoje) de uma transação recorrente.
 
-def generate_recurring_schedule(frequency, day, months_ahead):
-    """Gerar cronograma de ocorrências futuras"""
-    schedule = []
-    current_date = calculate_next_occurrence(frequency, day)
-    end_date = datetime.now() + timedelta(days=months_ahead * 30)
+    Hoje nunca conta, em nenhuma frequência: um modelo criado no próprio
+    dia da regra começa no período seguinte.
+    """
+    # weekly: dia da semana (0=segunda); monthly: dia do mês; yearly: dia do ano
+    return recurrence.to_datetime(recurrence.first_on_or_after(frequency, day, date.today() + timedelta(days=1)))
+
+def generate_recurring_schedule(frequency, day, months_ahead, offset=0, limit=PREVIEW_PAGE_SIZE):
+    """Gerar uma página do cronograma de ocorrências de amanhã até `months_ahead` meses.
+
+    Returns:
+        tuple: (lista de ocorrências formatadas, total de ocorrências no período)
+    """
+    today = date.today()
+    end_date = recurrence.add_months(today, months_ahead)
+    # Começa amanhã, como calculate_next_occurrence: a primeira linha é o next_occurrence do modelo
+    occurrences, total = recurrence.page(frequency, day, today + timedelta(days=1), end_date, offset=offset, limit=limit)
     
-    while current_date <= end_date and len(schedule) < 50:  # Limite de 50 ocorrências
+    schedule = []
+    for occurrence in occurrences:
+        current_date = recurrence.to_datetime(occurrence)
         schedule.append({
             'date': current_date.isoformat(),
             'formatted_date': current_date.strftime('%d/%m/%Y'),
             'day_of_week': current_date.strftime('%A'),
             'month_year': current_date.strftime('%B %Y')
         })
-        
-        # Calcular próxima ocorrência
-        if frequency == 'weekly':
-            current_date += timedelta(weeks=1)
-        elif frequency == 'monthly':
-            if current_date.month == 12:
-                try:
-                    current_date = current_date.replace(year=current_date.year + 1, month=1)
-                except ValueError:
-                    # Dia não existe no próximo mês
-                    last_day = calendar.monthrange(current_date.year + 1, 1)[1]
-                    current_date = datetime(current_date.year + 1, 1, min(day, last_day))
-            else:
-                try:
-                    current_date = current_date.replace(month=current_date.month + 1)
-                except ValueError:
-                    # Dia não existe no próximo mês
-                    last_day = calendar.monthrange(current_date.year, current_date.month + 1)[1]
-                    current_date = datetime(current_date.year, current_date.month + 1, min(day, last_day))
-        elif frequency == 'yearly':
-            current_date = current_date.replace(year=current_date.year + 1)
     
-    return schedule
-
+    return schedule, total
@@ -11,9 +11,13 @@ import io
 from auth import verify_token
 from models.transaction_mongo import Transaction
 from models.category_mongo import Category
+from models.rollup_mongo import MonthlyRollup
 
 reports_export_bp = Blueprint('reports_export', __name__)
 
+# Campos das transações lidos do banco para os relatórios
+EXPORT_FIELDS = ['date', 'description', 'category_id', 'type', 'amount', 'status']
+
 @reports_export_bp.route('/reports/export-pdf', methods=['GET'])
 @verify_token
 def export_transactions_pdf(current_user_uid):
@@ -28,18 +32,18 @@ def export_transactions_pdf(current_user_uid):
             'context': context
         }
         
-        transactions = Transaction.find_all(filters)
+        # Apenas os campos usados no relatório
+        transactions = Transaction.find_all(filters, fields=EXPORT_FIELDS)
         
         if not transactions:
             return jsonify({'error': 'Nenhuma transação encontrada'}), 404
         
         # CORREÇÃO: Buscar categorias APENAS do usuário logado
-        category_filters = {
-            'user_id': current_user_uid,  # FILTRO DE SEGURANÇA OBRIGATÓRIO
-            'context': context
-        }
-        categories = Category.find_all(category_filters)
-        category_map = {str(cat._id): cat.name for cat in categories}
+        # Uma única consulta ($in) com as categorias usadas nas transações
+        category_map = Category.names_by_ids(
+            [t.category_id for t in transactions if t.category_id],
+            user_id=current_user_uid  # FILTRO DE SEGURANÇA OBRIGATÓRIO
+        )
         
         # Criar PDF em memória
         buffer = io.BytesIO()
@@ -180,18 +184,18 @@ def export_transactions_csv(current_user_uid):
             'context': context
         }
         
-        transactions = Transaction.find_all(filters)
+        # Apenas os campos usados no relatório
+        transactions = Transaction.find_all(filters, fields=EXPORT_FIELDS)
         
         if not transactions:
             return jsonify({'error': 'Nenhuma transação encontrada'}), 404
         
         # CORREÇÃO: Buscar categorias APENAS do usuário logado
-        category_filters = {
-            'user_id': current_user_uid,  # FILTRO DE SEGURANÇA OBRIGATÓRIO
-            'context': context
-        }
-        categories = Category.find_all(category_filters)
-        category_map = {str(cat._id): cat.name for cat in categories}
+        # Uma única consulta ($in) com as categorias usadas nas transações
+        category_map = Category.names_by_ids(
+            [t.category_id for t in transactions if t.category_id],
+            user_id=current_user_uid  # FILTRO DE SEGURANÇA OBRIGATÓRIO
+        )
         
         # Gerar CSV
         import csv
@@ -228,3 +232,27 @@ def export_transactions_csv(current_user_uid):
         
     except Exception as e:
         return jsonify({'error': f'Erro ao gerar CSV: {str(e)}'}), 500
+
+@reports_export_bp.route('/reports/monthly-summary', methods=['GET'])
+@verify_token
+def monthly_summary(current_user_uid):
+    """Totais de cada mês do ano a partir dos rollups - APENAS DO USUÁRIO LOGADO"""
+    try:
+        context = request.args.get('context', 'business')
+        year = request.args.get('year', datetime.now().year, type=int)
+        
+        # Uma leitura por (mês, tipo, categoria), independente do número de transações
+        months = MonthlyRollup.year_summary(current_user_uid, context, year)
+        
+        category_map = Category.names_by_ids(
+            [item['category_id'] for month in months for item in month['by_category'] if item['category_id']],
+            user_id=current_user_uid  # FILTRO DE SEGURANÇA OBRIGATÓRIO
+        )
+        for month in months:
+            for item in month['by_category']:
+                item['category_name'] = category_map.get(item['category_id'])
+        
+        return jsonify({'context': context, 'year': year, 'months': months}), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro ao gerar resumo mensal: {str(e)}'}), 500
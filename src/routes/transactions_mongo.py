@@ -1,17 +1,30 @@
 # ARQUIVO CORRIGIDO E SEGURO: src/routes/transactions.py
 
-from flask import Blueprint, request, jsonify
-from models.transaction_mongo import Transaction
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from models.transaction_mongo import Transaction, STATUSES
 from models.category_mongo import Category
+from models import ownership
+from models.recurring_mongo import RecurringTemplate
 from auth import verify_token  # CORREÇÃO: Importar decorator de autenticação
-from datetime import datetime, date
-import calendar
+from services.json_stream import stream_json_array
+from services.response_cache import cached_response
+from services.etag import conditional_get
+from datetime import datetime
 import re
 
 transactions_bp = Blueprint('transactions', __name__)
 
+# Tamanho de página da listagem paginada de transações
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Modos da busca na lista simples: trecho da descrição (padrão) ou índice de texto
+SEARCH_MODES = ('substring', 'text')
+
 @transactions_bp.route('/transactions', methods=['GET'])
 @verify_token  # CORREÇÃO: Proteger rota com token
+@conditional_get('transactions')
+@cached_response('transactions')
 def get_transactions(current_user_uid):  # CORREÇÃO: Receber UID do usuário
     """Buscar transações APENAS do usuário logado"""
     try:
@@ -25,6 +38,13 @@ def get_transactions(current_user_uid):  # CORREÇÃO: Receber UID do usuário
         status_filter = request.args.get('status')
         search_term = request.args.get('search')
         limit = request.args.get('limit', type=int)
+        # Paginação por cursor: ?page_size=N[&cursor=...] retorna {transactions, next_cursor}
+        page_size = request.args.get('page_size', type=int)
+        cursor = request.args.get('cursor')
+        # Resposta em streaming: ?stream=true envia o array JSON em pedaços
+        stream = request.args.get('stream', 'false').lower() == 'true'
+        # Projeção opcional: ?fields=amount,type retorna apenas esses campos (+ id)
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
         
         # CORREÇÃO: Filtro OBRIGATÓRIO por user_id
         filters = {'user_id': current_user_uid}
@@ -36,20 +56,72 @@ def get_transactions(current_user_uid):  # CORREÇÃO: Receber UID do usuário
         if status_filter:
             filters['status'] = status_filter
             
-        if search_term:
-            # Busca case-insensitive na descrição
-            regex = re.compile(re.escape(search_term), re.IGNORECASE)
-            filters['description'] = regex
-
         if month and year:
             start_date = datetime(int(year), int(month), 1)
             end_date = datetime(int(year), int(month) + 1, 1) if int(month) < 12 else datetime(int(year) + 1, 1, 1)
             filters['date'] = {'$gte': start_date, '$lt': end_date}
         
+        if search_term and search_term.strip():
+            search_term = search_term.strip()
+            if page_size or cursor:
+                # Busca no índice de texto, por relevância (sem maiúsculas/acentos)
+                page_size = min(max(page_size or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+                try:
+                    transactions, next_cursor = Transaction.search(
+                        current_user_uid, search_term, filters, page_size=page_size, cursor=cursor
+                    )
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+                return jsonify({
+                    'transactions': Transaction.to_dict_many(transactions, user_id=current_user_uid),
+                    'next_cursor': next_cursor
+                })
+            
+            # Lista simples (formato antigo): por padrão mantém a busca por
+            # trecho da descrição ("merc" encontra "Mercado"); ?search_mode=text
+            # usa o índice de texto em uma única agregação
+            search_mode = request.args.get('search_mode', 'substring')
+            if search_mode not in SEARCH_MODES:
+                return jsonify({'error': f'search_mode deve ser um de: {", ".join(SEARCH_MODES)}'}), 400
+            limit = limit if limit and limit > 0 else None
+            if search_mode == 'text':
+                transactions = Transaction.search_all(current_user_uid, search_term, filters, limit=limit)
+            else:
+                filters['description'] = re.compile(re.escape(search_term), re.IGNORECASE)
+                transactions = Transaction.find_all(filters, limit=limit)
+            return jsonify(Transaction.to_dict_many(transactions, user_id=current_user_uid))
+        
+        if page_size or cursor:
+            page_size = min(max(page_size or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+            try:
+                transactions, next_cursor = Transaction.find_page(filters, page_size=page_size, cursor=cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({
+                'transactions': Transaction.to_dict_many(transactions, user_id=current_user_uid),
+                'next_cursor': next_cursor
+            })
+        
+        if stream and not fields:
+            # Serializa documento a documento a partir do cursor do MongoDB
+            items = Transaction.iter_dicts(filters, limit=limit, user_id=current_user_uid)
+            return Response(
+                stream_with_context(stream_json_array(items)),
+                mimetype='application/json'
+            )
+        
         # Buscar transações com limite
+        if fields:
+            try:
+                rows = Transaction.find_all(filters, limit=limit, fields=fields)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify([row.to_dict() for row in rows])
+        
         transactions = Transaction.find_all(filters, limit=limit)
         
-        return jsonify([t.to_dict() for t in transactions])
+        # Categorias resolvidas em uma única consulta para toda a lista
+        return jsonify(Transaction.to_dict_many(transactions, user_id=current_user_uid))
     except Exception as e:
         print(f"Error in get_transactions: {e}")
         return jsonify({'error': str(e)}), 500
@@ -57,7 +129,11 @@ def get_transactions(current_user_uid):  # CORREÇÃO: Receber UID do usuário
 @transactions_bp.route('/transactions', methods=['POST'])
 @verify_token  # CORREÇÃO: Proteger rota com token
 def create_transaction(current_user_uid):  # CORREÇÃO: Receber UID
-    """Criar transação para o usuário logado"""
+    """Criar transação para o usuário logado.
+
+    Com is_recurring e recurring_day, registra também o modelo mensal; as
+    ocorrências começam depois de hoje, mesmo para uma data retroativa.
+    """
     try:
         data = request.get_json()
         print(f"Received data: {data}")
@@ -100,30 +176,23 @@ def create_transaction(current_user_uid):  # CORREÇÃO: Receber UID
 def update_transaction(current_user_uid, transaction_id):  # CORREÇÃO: Receber UID
     """Atualizar transação verificando se pertence ao usuário"""
     try:
-        transaction = Transaction.find_by_id(transaction_id)
-        if not transaction:
-            return jsonify({'error': 'Transaction not found'}), 404
-        
-        # CORREÇÃO: Verificação de segurança crucial
-        if transaction.user_id != current_user_uid:
-            return jsonify({'error': 'Permission denied'}), 403
-        
-        data = request.get_json()
-        
-        transaction.description = data.get('description', transaction.description)
-        transaction.amount = float(data.get('amount', transaction.amount))
-        transaction.type = data.get('type', transaction.type)
-        transaction.context = data.get('context', transaction.context)
-        transaction.category_id = data.get('category_id', transaction.category_id)
-        transaction.status = data.get('status', transaction.status)
+        data = request.get_json() or {}
         
+        # Apenas os campos enviados são gravados ($set parcial)
+        changes = {field: data[field] for field in ('description', 'type', 'context', 'category_id', 'status') if field in data}
+        if 'amount' in data:
+            changes['amount'] = float(data['amount'])
         if data.get('date'):
-            transaction.date = datetime.strptime(data['date'], '%Y-%m-%d')
+            changes['date'] = datetime.strptime(data['date'], '%Y-%m-%d')
         if data.get('due_date'):
-            transaction.due_date = datetime.strptime(data['due_date'], '%Y-%m-%d')
+            changes['due_date'] = datetime.strptime(data['due_date'], '%Y-%m-%d')
         
-        transaction.updated_at = datetime.utcnow()
-        transaction.save()
+        # CORREÇÃO: Verificação de segurança crucial (o filtro da escrita inclui o user_id)
+        transaction, error = Transaction.update_owned(transaction_id, current_user_uid, changes)
+        if error == ownership.NOT_FOUND:
+            return jsonify({'error': 'Transaction not found'}), 404
+        if error == ownership.FORBIDDEN:
+            return jsonify({'error': 'Permission denied'}), 403
         
         return jsonify(transaction.to_dict())
     except Exception as e:
@@ -135,68 +204,148 @@ def update_transaction(current_user_uid, transaction_id):  # CORREÇÃO: Receber
 def delete_transaction(current_user_uid, transaction_id):  # CORREÇÃO: Receber UID
     """Deletar transação verificando se pertence ao usuário"""
     try:
-        transaction = Transaction.find_by_id(transaction_id)
-        if not transaction:
+        # CORREÇÃO: Verificação de segurança crucial (o filtro da remoção inclui o user_id)
+        error = Transaction.delete_owned(transaction_id, current_user_uid)
+        if error == ownership.NOT_FOUND:
             return jsonify({'error': 'Transaction not found'}), 404
-        
-        # CORREÇÃO: Verificação de segurança crucial
-        if transaction.user_id != current_user_uid:
+        if error == ownership.FORBIDDEN:
             return jsonify({'error': 'Permission denied'}), 403
         
-        transaction.delete()
         return jsonify({'message': 'Transaction deleted successfully'})
     except Exception as e:
         print(f"Error in delete_transaction: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Filtros aceitos pelas operações em lote (além de uma lista de ids)
+BULK_FILTER_FIELDS = ('context', 'type', 'status', 'category_id')
+# Máximo de ids em uma operação em lote (tamanho do $in)
+BULK_MAX_IDS = 500
+
+def _bulk_selection(data):
+    """Extrai (ids, filters) do corpo de uma operação em lote; ValueError se inválido"""
+    ids = data.get('ids')
+    spec = data.get('filter')
+    
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ValueError('ids deve ser uma lista não vazia')
+        if len(ids) > BULK_MAX_IDS:
+            raise ValueError(f'No máximo {BULK_MAX_IDS} ids por operação')
+        return ids, None
+    
+    if not isinstance(spec, dict):
+        raise ValueError('Informe ids ou filter')
+    
+    filters = {}
+    for field in BULK_FILTER_FIELDS:
+        value = spec.get(field)
+        if value is None:
+            continue
+        # Só igualdade com texto: objetos como {"$exists": true} virariam operadores do MongoDB
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f'filter.{field} deve ser um texto não vazio')
+        filters[field] = value
+    if spec.get('month') and spec.get('year'):
+        month, year = int(spec['month']), int(spec['year'])
+        if not 1 <= month <= 12:
+            raise ValueError('Mês inválido')
+        start_date = datetime(year, month, 1)
+        end_date = datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1)
+        filters['date'] = {'$gte': start_date, '$lt': end_date}
+    
+    # Evita alterar todas as transações do usuário por engano
+    if not filters:
+        raise ValueError('O filtro precisa de ao menos um campo')
+    return None, filters
+
+@transactions_bp.route('/transactions/bulk/status', methods=['POST'])
+@verify_token
+def bulk_update_status(current_user_uid):
+    """Alterar o status de várias transações do usuário logado"""
+    try:
+        data = request.get_json() or {}
+        status = data.get('status')
+        if not status:
+            return jsonify({'error': 'status é obrigatório'}), 400
+        if status not in STATUSES:
+            return jsonify({'error': f'status deve ser um de: {", ".join(STATUSES)}'}), 400
+        
+        ids, filters = _bulk_selection(data)
+        result = Transaction.bulk_update(current_user_uid, {'status': status}, ids=ids, filters=filters)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in bulk_update_status: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/transactions/bulk/category', methods=['POST'])
+@verify_token
+def bulk_update_category(current_user_uid):
+    """Recategorizar várias transações do usuário logado"""
+    try:
+        data = request.get_json() or {}
+        category_id = data.get('category_id')
+        if not category_id:
+            return jsonify({'error': 'category_id é obrigatório'}), 400
+        
+        # A categoria de destino também precisa pertencer ao usuário
+        category = Category.find_by_id(category_id)
+        if not category or category.user_id != current_user_uid:
+            return jsonify({'error': 'Category not found'}), 404
+        
+        ids, filters = _bulk_selection(data)
+        result = Transaction.bulk_update(current_user_uid, {'category_id': category_id}, ids=ids, filters=filters)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in bulk_update_category: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/transactions/bulk/delete', methods=['POST'])
+@verify_token
+def bulk_delete_transactions(current_user_uid):
+    """Deletar várias transações do usuário logado"""
+    try:
+        data = request.get_json() or {}
+        ids, filters = _bulk_selection(data)
+        result = Transaction.bulk_delete(current_user_uid, ids=ids, filters=filters)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in bulk_delete_transactions: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @transactions_bp.route('/dashboard/summary', methods=['GET'])
 @verify_token  # CORREÇÃO: Proteger rota com token
+@conditional_get('dashboard', per_day=True)
+@cached_response('dashboard', per_day=True)
 def get_dashboard_summary(current_user_uid):  # CORREÇÃO: Receber UID
     """Resumo do dashboard APENAS do usuário logado"""
     try:
         context = request.args.get('context', 'business')
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        
-        # CORREÇÃO: Filtro obrigatório por user_id
-        filters = {
-            'user_id': current_user_uid,  # SEGURANÇA: Apenas dados do usuário
-            'context': context,
-            'date': {
-                '$gte': datetime(current_year, current_month, 1),
-                '$lt': datetime(current_year, current_month + 1, 1) if current_month < 12 else datetime(current_year + 1, 1, 1)
-            }
-        }
-        
-        month_transactions = Transaction.find_all(filters)
+        # Mês/ano opcionais (padrão: mês atual)
+        now = datetime.now()
+        current_month = request.args.get('month', default=now.month, type=int)
+        current_year = request.args.get('year', default=now.year, type=int)
+        if not 1 <= current_month <= 12:
+            return jsonify({'error': 'Mês inválido'}), 400
+        # O intervalo do mês vai até 1º de janeiro do ano seguinte
+        if not 1 <= current_year < 9999:
+            return jsonify({'error': 'Ano inválido'}), 400
         
-        total_income = sum(t.amount for t in month_transactions if t.type == 'income')
-        total_expenses = sum(t.amount for t in month_transactions if t.type == 'expense')
-        balance = total_income - total_expenses
-        
-        # CORREÇÃO: Filtros para pagamentos e recebimentos com user_id
-        pending_filters = {
-            'user_id': current_user_uid,
-            'context': context, 
-            'type': 'expense', 
-            'status': 'pending'
-        }
-        pending_payments = len(Transaction.find_all(pending_filters))
-        
-        receivable_filters = {
-            'user_id': current_user_uid,
-            'context': context, 
-            'type': 'income', 
-            'status': 'pending'
-        }
-        upcoming_receivables = len(Transaction.find_all(receivable_filters))
+        # CORREÇÃO: Filtro obrigatório por user_id (aplicado dentro da agregação)
+        # Totais do mês e contagem de pendências em uma única agregação
+        summary = Transaction.dashboard_summary(current_user_uid, context, current_year, current_month)
         
         return jsonify({
-            'balance': balance,
-            'total_income': total_income,
-            'total_expenses': total_expenses,
-            'pending_payments': pending_payments,
-            'upcoming_receivables': upcoming_receivables,
+            'balance': summary['total_income'] - summary['total_expenses'],
+            'total_income': summary['total_income'],
+            'total_expenses': summary['total_expenses'],
+            'pending_payments': summary['pending_payments'],
+            'upcoming_receivables': summary['upcoming_receivables'],
             'month': current_month,
             'year': current_year
         })
@@ -205,49 +354,18 @@ def get_dashboard_summary(current_user_uid):  # CORREÇÃO: Receber UID
         return jsonify({'error': str(e)}), 500
 
 def create_next_recurring_transaction(original_transaction):
-    """Criar próxima transação recorrente mantendo o user_id"""
+    """Registrar o modelo mensal da transação recorrente mantendo o user_id.
+
+    As próximas ocorrências são geradas pelo scheduler (src/scheduler.py),
+    fora da requisição, uma única vez por data. A primeira é a do dia
+    recurring_day depois de hoje (ou da data da transação, se futura): uma
+    transação retroativa não gera mais os meses entre a data dela e hoje.
+    """
     try:
-        today = date.today()
-        next_month = today.month + 1 if today.month < 12 else 1
-        next_year = today.year if today.month < 12 else today.year + 1
-        
-        last_day = calendar.monthrange(next_year, next_month)[1]
-        next_day = min(original_transaction.recurring_day, last_day)
-        next_due_date = datetime(next_year, next_month, next_day)
-        
-        # CORREÇÃO: Incluir user_id na busca por transações existentes
-        filters = {
-            'user_id': original_transaction.user_id,  # SEGURANÇA
-            'description': original_transaction.description,
-            'context': original_transaction.context,
-            'is_recurring': True,
-            'date': {
-                '$gte': datetime(next_year, next_month, 1),
-                '$lt': datetime(next_year, next_month + 1, 1) if next_month < 12 else datetime(next_year + 1, 1, 1)
-            }
-        }
-        
-        existing = Transaction.find_all(filters)
-        
-        if not existing:
-            next_transaction = Transaction(
-                user_id=original_transaction.user_id,  # CORREÇÃO: Manter user_id
-                description=original_transaction.description,
-                amount=original_transaction.amount,
-                type=original_transaction.type,
-                context=original_transaction.context,
-                category_id=original_transaction.category_id,
-                date=next_due_date,
-                due_date=next_due_date,
-                status='pending',
-                is_recurring=True,
-                recurring_day=original_transaction.recurring_day
-            )
-            
-            next_transaction.save()
-            print(f"Next recurring transaction created: {next_transaction._id}")
+        template_id = RecurringTemplate.create_from_transaction(original_transaction)
+        print(f"Recurring template created: {template_id}")
     except Exception as e:
-        print(f"Error creating recurring transaction: {e}")
+        print(f"Error creating recurring template: {e}")
 
 # CORREÇÃO: Nova rota para corrigir a rota seed que estava duplicada
 @transactions_bp.route('/categories/seed', methods=['POST'])
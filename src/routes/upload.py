@@ -33,7 +33,7 @@ def upload_document():
             return jsonify({'error': upload_result['error']}), 500
         
         # Salvar informações do documento no MongoDB
-        from src.database.mongodb import mongodb
+        from database.mongodb import mongodb
         document_data = {
             'filename': file.filename,
             'original_name': file.filename,
@@ -91,7 +91,7 @@ def upload_bank_extract():
             return jsonify({'error': upload_result['error']}), 500
         
         # Salvar extrato no MongoDB
-        from src.database.mongodb import mongodb
+        from database.mongodb import mongodb
         extract_data = {
             'filename': file.filename,
             'original_name': file.filename,
@@ -135,7 +135,7 @@ def get_documents():
         context = request.args.get('context')
         document_type = request.args.get('type')
         
-        from src.database.mongodb import mongodb
+        from database.mongodb import mongodb
         query = {}
         if context:
             query['context'] = context
@@ -167,7 +167,7 @@ def get_bank_extracts():
     try:
         context = request.args.get('context')
         
-        from src.database.mongodb import mongodb
+        from database.mongodb import mongodb
         query = {}
         if context:
             query['context'] = context
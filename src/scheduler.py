@@ -0,0 +1,124 @@
+# ARQUIVO: src/scheduler.py
+# Worker que gera as transações recorrentes vencidas de todos os usuários,
+# fora do caminho das requisições.
+#
+# Uso (a partir da raiz do projeto):
+#     python src/scheduler.py            # laço contínuo (SCHEDULER_INTERVAL_SECONDS)
+#     python src/scheduler.py --once     # uma execução e sai (cron, testes)
+#
+# Para rodar contra um MongoDB de testes basta apontar MONGO_URI/MONGO_DB_NAME.
+# Um lease no MongoDB garante que só uma instância processe por vez; o
+# resultado da última execução fica em scheduler_runs e aparece em
+# /api/health/metrics (com o METRICS_TOKEN).
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime
+
+# Ajuste para que o Python encontre os módulos dentro de 'src'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
+
+from config import Config
+from database.mongodb import mongodb
+from models.recurring_mongo import RecurringTemplate
+from services import recurrence
+from services.lease import MongoLease
+
+JOB_NAME = 'recurring'
+RUNS_COLLECTION = 'scheduler_runs'
+
+
+def last_run(job_name=JOB_NAME):
+    """Métricas da última execução do job (ou None se nunca rodou)"""
+    doc = mongodb.db[RUNS_COLLECTION].find_one({'_id': job_name})
+    if not doc:
+        return None
+    doc.pop('_id', None)
+    for field in ('started_at', 'finished_at'):
+        if isinstance(doc.get(field), datetime):
+            doc[field] = doc[field].isoformat()
+    return doc
+
+
+def run_once(lease, batch_size=None, until=None):
+    """
+    Processa os modelos recorrentes vencidos de todos os usuários, em lotes.
+
+    Returns:
+        dict: Métricas da execução, ou None se outra instância detém o lease
+    """
+    if not lease.acquire():
+        print(f"Scheduler: lease '{lease.name}' em uso por outra instância; pulando execução")
+        return None
+
+    batch_size = batch_size or Config.SCHEDULER_BATCH_SIZE
+    until = until or recurrence.to_datetime(date.today())
+    started_at = datetime.utcnow()
+    metrics = {
+        'owner': lease.owner,
+        'started_at': started_at,
+        'until': until.isoformat(),
+        'batches': 0,
+        'templates': 0,
+        'generated': 0,
+        'error': None
+    }
+
+    try:
+        after = None
+        while True:
+            templates = RecurringTemplate.due_templates(until, limit=batch_size, after=after)
+            if not templates:
+                break
+            generated = RecurringTemplate.materialize(templates, until)
+
+            metrics['batches'] += 1
+            metrics['templates'] += len(templates)
+            metrics['generated'] += len(generated)
+            # Posição do último modelo antes do avanço feito por materialize
+            after = (templates[-1]['next_occurrence'], templates[-1]['_id'])
+
+            # Renova o prazo entre lotes; se perdeu o lease, outra instância continua
+            if not lease.renew():
+                metrics['error'] = 'Lease perdido durante a execução'
+                break
+    except Exception as e:
+        metrics['error'] = str(e)
+        print(f"Scheduler: erro ao processar recorrências: {e}")
+    finally:
+        finished_at = datetime.utcnow()
+        metrics['finished_at'] = finished_at
+        metrics['duration_ms'] = round((finished_at - started_at).total_seconds() * 1000, 1)
+        mongodb.db[RUNS_COLLECTION].replace_one({'_id': JOB_NAME}, metrics, upsert=True)
+
+    print(f"Scheduler: {metrics['templates']} modelos, {metrics['generated']} transações geradas "
+          f"em {metrics['batches']} lotes ({metrics['duration_ms']} ms)")
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera as transações recorrentes vencidas')
+    parser.add_argument('--once', action='store_true', help='Executa uma vez e sai')
+    parser.add_argument('--interval', type=int, default=Config.SCHEDULER_INTERVAL_SECONDS,
+                        help='Segundos entre execuções no modo contínuo')
+    parser.add_argument('--batch-size', type=int, default=Config.SCHEDULER_BATCH_SIZE)
+    args = parser.parse_args()
+
+    lease = MongoLease(JOB_NAME, duration_seconds=Config.SCHEDULER_LEASE_SECONDS)
+    try:
+        if args.once:
+            run_once(lease, batch_size=args.batch_size)
+            return
+
+        while True:
+            run_once(lease, batch_size=args.batch_size)
+            time.sleep(args.interval)
+    finally:
+        lease.release()
+        mongodb.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import json
+import threading
+from datetime import datetime
+from config import Config
+from services.cache import LRUCache
+from services.redis_client import get_redis
+from services.versioning import VersionCounter
+
+
+class CategoryCache:
+    """
+    Cache das categorias de cada usuário, por (user_id, context).
+
+    Camada LRU em memória (limitada) e camada opcional no Redis. A invalidação
+    é feita por versão: Category.save()/delete() incrementam a versão do
+    usuário (compartilhada entre os workers, ver VersionCounter) e as
+    entradas anteriores simplesmente deixam de ser lidas.
+    """
+
+    REDIS_PREFIX = 'categories:'
+
+    def __init__(self, max_size=5000, ttl=300):
+        self._local = LRUCache(max_size=max_size)
+        self.ttl = ttl
+        self.versions = VersionCounter('categories')
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def key(self, user_id, context=None):
+        """Chave com a versão atual do usuário.
+
+        Deve ser obtida uma vez, antes da consulta ao banco, e reutilizada no
+        set(): uma escrita concorrente que incremente a versão no meio do
+        caminho faz o resultado (possivelmente antigo) ficar sob a versão
+        anterior, que não é mais lida.
+        """
+        version = self.versions.get(user_id)
+        return f'{user_id}:{context or "*"}:v{version}'
+
+    @staticmethod
+    def _dump(docs):
+        return json.dumps([
+            dict(doc, created_at=doc['created_at'].isoformat() if isinstance(doc.get('created_at'), datetime) else None)
+            for doc in docs
+        ])
+
+    @staticmethod
+    def _load(raw):
+        docs = json.loads(raw)
+        for doc in docs:
+            if doc.get('created_at'):
+                doc['created_at'] = datetime.fromisoformat(doc['created_at'])
+        return docs
+
+    def get(self, key):
+        """Documentos das categorias (lista de dicts) da chave, ou None em caso de miss"""
+
+        docs = self._local.get(key)
+        if docs is not None:
+            self._count('local_hits')
+            return docs
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                raw = redis_client.get(self.REDIS_PREFIX + key)
+                if raw:
+                    docs = self._load(raw)
+                    self._local.set(key, docs, ttl=self.ttl)
+                    self._count('redis_hits')
+                    return docs
+            except Exception as e:
+                print(f"Erro ao ler cache de categorias no Redis: {e}")
+
+        self._count('misses')
+        return None
+
+    def set(self, key, docs):
+        self._local.set(key, docs, ttl=self.ttl)
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.setex(self.REDIS_PREFIX + key, self.ttl, self._dump(docs))
+            except Exception as e:
+                print(f"Erro ao gravar cache de categorias no Redis: {e}")
+
+    def invalidate(self, user_id):
+        """Invalida todas as entradas do usuário (todos os contextos)"""
+        if user_id is None:
+            return
+        try:
+            self.versions.bump(user_id)
+        except Exception as e:
+            # A escrita em si já foi feita; o TTL limita a defasagem
+            print(f"Erro ao invalidar cache de categorias: {e}")
+            return
+        self._count('invalidations')
+
+    def stats(self):
+        hits = self.local_hits + self.redis_hits
+        lookups = hits + self.misses
+        return {
+            'local_hits': self.local_hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'evictions': self._local.evictions,
+            'local_size': len(self._local),
+            'max_size': self._local.max_size,
+            'ttl': self.ttl
+        }
+
+
+# Instância global
+category_cache = CategoryCache(max_size=Config.CATEGORY_CACHE_MAX_SIZE, ttl=Config.CATEGORY_CACHE_TTL)
@@ -0,0 +1,80 @@
+from flask import g, has_app_context
+from pymongo import ReturnDocument
+from database.mongodb import mongodb
+from services.redis_client import get_redis
+from services.versioning import VersionCounter
+
+
+class DataVersion:
+    """
+    Versão dos dados de cada usuário (transações e categorias).
+
+    Incrementada pelos caminhos de escrita dos modelos e usada para invalidar
+    o cache de respostas e como ETag das rotas de leitura. Fica no Redis quando
+    configurado; caso contrário na coleção data_versions do MongoDB, para que
+    todos os workers enxerguem a mesma versão. Dentro de uma requisição o
+    valor lido é reaproveitado (flask.g).
+    """
+
+    COLLECTION = 'data_versions'
+
+    def __init__(self):
+        self._redis_counter = VersionCounter('data')
+
+    @staticmethod
+    def _request_store():
+        if not has_app_context():
+            return None
+        store = getattr(g, '_data_versions', None)
+        if store is None:
+            store = g._data_versions = {}
+        return store
+
+    def get(self, user_id):
+        store = self._request_store()
+        if store is not None and user_id in store:
+            return store[user_id]
+
+        if get_redis() is not None:
+            version = self._redis_counter.get(user_id)
+        else:
+            doc = mongodb.db[self.COLLECTION].find_one({'_id': user_id}, {'version': 1})
+            version = doc['version'] if doc else 0
+
+        if store is not None:
+            store[user_id] = version
+        return version
+
+    def bump(self, user_id):
+        """Incrementa a versão do usuário e retorna o novo valor"""
+        if get_redis() is not None:
+            version = self._redis_counter.bump(user_id)
+        else:
+            doc = mongodb.db[self.COLLECTION].find_one_and_update(
+                {'_id': user_id},
+                {'$inc': {'version': 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            version = doc['version']
+
+        store = self._request_store()
+        if store is not None:
+            store[user_id] = version
+        return version
+
+
+# Instância global
+data_version = DataVersion()
+
+
+def bump_data_version(user_id):
+    """Registra uma escrita nos dados do usuário"""
+    if user_id is None:
+        return None
+    try:
+        return data_version.bump(user_id)
+    except Exception as e:
+        # A escrita em si já foi feita; caches por TTL limitam a defasagem
+        print(f"Erro ao incrementar a versão dos dados do usuário: {e}")
+        return None
@@ -0,0 +1,44 @@
+import hashlib
+from datetime import date
+from functools import wraps
+from flask import make_response, request
+from services.data_version import data_version
+
+
+def data_etag(namespace, user_id, per_day=False):
+    """ETag forte derivada da versão dos dados do usuário"""
+    version = data_version.get(user_id)
+    extra = date.today().isoformat() if per_day else ''
+    raw = f'{namespace}:{user_id}:{version}:{extra}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def conditional_get(namespace, per_day=False):
+    """
+    Decorator para rotas GET que recebem current_user_uid (usar abaixo de @verify_token).
+
+    Emite a versão dos dados do usuário como ETag e responde 304 a um
+    If-None-Match correspondente, sem executar a rota. A URL (e portanto os
+    parâmetros da query) já distingue as entradas no cache do navegador.
+    Com per_day=True a data atual entra na ETag (rotas cujo padrão depende
+    do mês corrente).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(current_user_uid, *args, **kwargs):
+            etag = data_etag(namespace, current_user_uid, per_day)
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(current_user_uid, *args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            # O navegador guarda a resposta, mas sempre revalida com If-None-Match
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return decorated_function
+    return decorator
@@ -0,0 +1,60 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+
+
+def _build_session():
+    """Cria uma sessão HTTP com pool de conexões keep-alive e retentativas limitadas"""
+    retry = Retry(
+        total=Config.HTTP_MAX_RETRIES,
+        connect=Config.HTTP_MAX_RETRIES,
+        read=0,  # Não repetir após o servidor já ter recebido a requisição
+        status=Config.HTTP_MAX_RETRIES,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'POST']),
+        backoff_factor=0.2,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Content-Type': 'application/json'})
+    return session
+
+
+def get_session():
+    """
+    Retorna a sessão HTTP compartilhada deste processo.
+
+    Recriada após um fork para que os workers do gunicorn não compartilhem sockets.
+    """
+    global _session, _session_pid
+
+    if _session is not None and _session_pid == os.getpid():
+        return _session
+
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = _build_session()
+            _session_pid = os.getpid()
+
+    return _session
+
+
+def default_timeout():
+    """Timeouts (conexão, leitura) usados nas chamadas externas"""
+    return (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
@@ -0,0 +1,28 @@
+import json
+
+
+def stream_json_array(items, buffer_size=64 * 1024):
+    """
+    Serializa um iterável de dicionários como um array JSON, em pedaços.
+
+    Cada item é convertido assim que chega, e o texto é enviado em blocos de
+    aproximadamente `buffer_size` caracteres. A memória usada não depende do
+    número de itens e o primeiro byte sai antes de a consulta terminar.
+    Para usar com Response(stream_with_context(...)).
+    """
+    buffer = ['[']
+    buffered = 1
+    first = True
+
+    for item in items:
+        chunk = json.dumps(item) if first else ',' + json.dumps(item)
+        first = False
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= buffer_size:
+            yield ''.join(buffer)
+            buffer = []
+            buffered = 0
+
+    buffer.append(']')
+    yield ''.join(buffer)
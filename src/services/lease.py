@@ -0,0 +1,48 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from database.mongodb import mongodb
+
+
+class MongoLease:
+    """
+    Lease (trava com prazo) guardado na coleção scheduler_locks.
+
+    Só um processo mantém o lease de um nome por vez. Quem o detém renova o
+    prazo enquanto trabalha; se o processo morrer, o lease expira sozinho e
+    outra instância pode assumir.
+    """
+
+    COLLECTION = 'scheduler_locks'
+
+    def __init__(self, name, duration_seconds=120):
+        self.name = name
+        self.duration = timedelta(seconds=duration_seconds)
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    def acquire(self):
+        """Obtém ou renova o lease; False se outra instância o detém"""
+        now = datetime.utcnow()
+        try:
+            doc = mongodb.db[self.COLLECTION].find_one_and_update(
+                {'_id': self.name, '$or': [{'expires_at': {'$lt': now}}, {'owner': self.owner}]},
+                {'$set': {'owner': self.owner, 'expires_at': now + self.duration, 'renewed_at': now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # O documento existe, está válido e pertence a outra instância
+            return False
+        return doc is not None and doc.get('owner') == self.owner
+
+    # Renovar é o mesmo que obter de novo sendo o dono atual
+    renew = acquire
+
+    def release(self):
+        mongodb.db[self.COLLECTION].update_one(
+            {'_id': self.name, 'owner': self.owner},
+            {'$set': {'expires_at': datetime.utcnow()}}
+        )
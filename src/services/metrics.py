@@ -0,0 +1,60 @@
+import bisect
+import threading
+
+
+class Histogram:
+    """
+    Histograma simples de latências (em segundos) com buckets fixos.
+
+    Mantido em memória por processo e exposto em /api/health/metrics.
+    """
+
+    DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name, buckets=None):
+        self.name = name
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        self._counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def quantile(self, q):
+        """Estimativa do quantil q (limite superior do bucket onde ele cai)"""
+        with self._lock:
+            if not self._count:
+                return None
+            target = q * self._count
+            cumulative = 0
+            for index, count in enumerate(self._counts):
+                cumulative += count
+                if cumulative >= target:
+                    return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return None
+
+    def snapshot(self):
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets['+Inf'] = self._count
+            total, count = self._sum, self._count
+
+        return {
+            'name': self.name,
+            'count': count,
+            'sum': round(total, 6),
+            'avg': round(total / count, 6) if count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': buckets
+        }
@@ -0,0 +1,136 @@
+import calendar
+from datetime import date, datetime, timedelta
+
+# Frequências suportadas e o significado de recurring_day em cada uma:
+#   weekly  - dia da semana (0=segunda ... 6=domingo)
+#   monthly - dia do mês (1-31; em meses mais curtos usa o último dia)
+#   yearly  - dia do ano (1-366; em anos não bissextos o dia 366 vira 31/12)
+FREQUENCIES = ('weekly', 'monthly', 'yearly')
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _monthly(year, month, day):
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _yearly(year, day):
+    days_in_year = 366 if calendar.isleap(year) else 365
+    return date(year, 1, 1) + timedelta(days=min(day, days_in_year) - 1)
+
+
+def validate(frequency, day):
+    """ValueError se a frequência ou o dia forem inválidos"""
+    if frequency not in FREQUENCIES:
+        raise ValueError(f'Frequência inválida: {frequency}')
+    limits = {'weekly': (0, 6), 'monthly': (1, 31), 'yearly': (1, 366)}[frequency]
+    if not limits[0] <= day <= limits[1]:
+        raise ValueError(f'Dia inválido para a frequência {frequency}: {day}')
+
+
+def first_on_or_after(frequency, day, start):
+    """Primeira ocorrência na data `start` ou depois"""
+    validate(frequency, day)
+    start = _as_date(start)
+
+    if frequency == 'weekly':
+        return start + timedelta(days=(day - start.weekday()) % 7)
+
+    if frequency == 'monthly':
+        candidate = _monthly(start.year, start.month, day)
+        if candidate < start:
+            year, month = (start.year + 1, 1) if start.month == 12 else (start.year, start.month + 1)
+            candidate = _monthly(year, month, day)
+        return candidate
+
+    candidate = _yearly(start.year, day)
+    if candidate < start:
+        candidate = _yearly(start.year + 1, day)
+    return candidate
+
+
+def next_after(frequency, day, occurrence):
+    """Ocorrência seguinte a `occurrence` (que deve ser uma ocorrência da regra)"""
+    occurrence = _as_date(occurrence)
+
+    if frequency == 'weekly':
+        return occurrence + timedelta(weeks=1)
+
+    if frequency == 'monthly':
+        year, month = (occurrence.year + 1, 1) if occurrence.month == 12 else (occurrence.year, occurrence.month + 1)
+        # Sempre a partir do dia original: 31/01 -> 29/02 -> 31/03
+        return _monthly(year, month, day)
+
+    return _yearly(occurrence.year + 1, day)
+
+
+def occurrence_at(frequency, day, first, n):
+    """n-ésima ocorrência a partir de `first` (n=0 é a própria), sem iterar"""
+    first = _as_date(first)
+
+    if frequency == 'weekly':
+        return first + timedelta(weeks=n)
+
+    if frequency == 'monthly':
+        index = first.year * 12 + (first.month - 1) + n
+        return _monthly(index // 12, index % 12 + 1, day)
+
+    return _yearly(first.year + n, day)
+
+
+def count_until(frequency, day, first, end):
+    """Número de ocorrências de `first` até `end` (inclusive), em tempo constante"""
+    first, end = _as_date(first), _as_date(end)
+    if end < first:
+        return 0
+
+    if frequency == 'weekly':
+        return (end - first).days // 7 + 1
+
+    if frequency == 'monthly':
+        steps = (end.year - first.year) * 12 + (end.month - first.month)
+    else:
+        steps = end.year - first.year
+    # A ocorrência do último período pode cair depois de `end` (ex.: dia 31 e end em 15/03)
+    return steps + 1 if occurrence_at(frequency, day, first, steps) <= end else steps
+
+
+def iter_occurrences(frequency, day, start, end=None):
+    """Ocorrências a partir de `start` (inclusive), geradas sob demanda.
+
+    Sem `end` o gerador é infinito: consuma com islice ou interrompa o laço.
+    """
+    current = first_on_or_after(frequency, day, start)
+    end = _as_date(end) if end is not None else None
+    while end is None or current <= end:
+        yield current
+        current = next_after(frequency, day, current)
+
+
+def page(frequency, day, start, end, offset=0, limit=50):
+    """Uma página das ocorrências entre `start` e `end` (inclusive).
+
+    O custo depende só do tamanho da página, não do intervalo: o total e cada
+    ocorrência são calculados diretamente (occurrence_at/count_until).
+
+    Returns:
+        tuple: (lista de datas, total de ocorrências no intervalo)
+    """
+    first = first_on_or_after(frequency, day, start)
+    total = count_until(frequency, day, first, end)
+    stop = min(offset + limit, total)
+    return [occurrence_at(frequency, day, first, n) for n in range(offset, stop)], total
+
+
+def add_months(value, months):
+    """Soma meses a uma data, limitando ao último dia do mês de destino"""
+    value = _as_date(value)
+    index = value.year * 12 + (value.month - 1) + months
+    return _monthly(index // 12, index % 12 + 1, value.day)
+
+
+def to_datetime(value):
+    """Data de ocorrência como datetime à meia-noite (formato gravado no MongoDB)"""
+    return datetime(value.year, value.month, value.day)
@@ -0,0 +1,42 @@
+import os
+import threading
+from config import Config
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Retorna um cliente Redis compartilhado pelo processo.
+
+    Retorna None quando REDIS_URL não está configurada ou o pacote redis não
+    está disponível, para que os chamadores usem apenas a camada em memória.
+    O cliente é recriado após um fork (gunicorn) para não compartilhar sockets.
+    """
+    global _client, _client_pid
+
+    if not Config.REDIS_URL:
+        return None
+
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            try:
+                import redis
+                _client = redis.Redis.from_url(
+                    Config.REDIS_URL,
+                    socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                    health_check_interval=30
+                )
+                _client_pid = os.getpid()
+            except Exception as e:
+                print(f"AVISO: Não foi possível criar o cliente Redis: {e}")
+                _client = None
+                return None
+
+    return _client
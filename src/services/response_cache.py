@@ -0,0 +1,134 @@
+import hashlib
+import threading
+from datetime import date
+from functools import wraps
+from flask import Response, make_response, request
+from config import Config
+from services.cache import LRUCache
+from services.data_version import data_version
+from services.redis_client import get_redis
+
+
+class ResponseCache:
+    """
+    Cache de respostas JSON de rotas de leitura, por usuário.
+
+    A chave combina o usuário, a versão dos dados dele (services.data_version)
+    e os parâmetros da query normalizados (ordenados). Escritas em transações
+    ou categorias incrementam a versão e as respostas anteriores deixam de ser
+    lidas. Camada LRU em memória e camada opcional no Redis; a versão é
+    compartilhada entre os workers (Redis ou MongoDB).
+    """
+
+    REDIS_PREFIX = 'response:'
+
+    def __init__(self, max_size=2000, ttl=30, max_bytes=1024 * 1024):
+        self._local = LRUCache(max_size=max_size)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def key(self, namespace, user_id, extra=None):
+        params = sorted((name, value) for name, values in request.args.lists() for value in values)
+        raw = repr((params, extra))
+        digest = hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+        version = data_version.get(user_id)
+        return f'{namespace}:{user_id}:v{version}:{digest}'
+
+    def get(self, key):
+        """Corpo da resposta (bytes) ou None em caso de miss"""
+        body = self._local.get(key)
+        if body is not None:
+            self._count('local_hits')
+            return body
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                body = redis_client.get(self.REDIS_PREFIX + key)
+                if body is not None:
+                    self._local.set(key, body, ttl=self.ttl)
+                    self._count('redis_hits')
+                    return body
+            except Exception as e:
+                print(f"Erro ao ler cache de respostas no Redis: {e}")
+
+        self._count('misses')
+        return None
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        self._local.set(key, body, ttl=self.ttl)
+        self._count('stores')
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.setex(self.REDIS_PREFIX + key, self.ttl, body)
+            except Exception as e:
+                print(f"Erro ao gravar cache de respostas no Redis: {e}")
+
+    def stats(self):
+        hits = self.local_hits + self.redis_hits
+        lookups = hits + self.misses
+        return {
+            'enabled': Config.RESPONSE_CACHE_ENABLED,
+            'local_hits': self.local_hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self._local.evictions,
+            'local_size': len(self._local),
+            'max_size': self._local.max_size,
+            'ttl': self.ttl
+        }
+
+
+# Instância global
+response_cache = ResponseCache(
+    max_size=Config.RESPONSE_CACHE_MAX_SIZE,
+    ttl=Config.RESPONSE_CACHE_TTL,
+    max_bytes=Config.RESPONSE_CACHE_MAX_BYTES
+)
+
+
+def cached_response(namespace, per_day=False):
+    """
+    Decorator para rotas GET que recebem current_user_uid (usar abaixo de @verify_token).
+
+    Apenas respostas 200 JSON não-streaming são guardadas. Com per_day=True a
+    data atual entra na chave (rotas cujo padrão depende do mês corrente).
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(current_user_uid, *args, **kwargs):
+            if not Config.RESPONSE_CACHE_ENABLED:
+                return f(current_user_uid, *args, **kwargs)
+
+            extra = date.today().isoformat() if per_day else None
+            key = response_cache.key(namespace, current_user_uid, extra)
+            body = response_cache.get(key)
+            if body is not None:
+                response = Response(body, status=200, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(f(current_user_uid, *args, **kwargs))
+            if (response.status_code == 200 and not response.is_streamed
+                    and response.mimetype == 'application/json'):
+                response_cache.set(key, response.get_data())
+                response.headers['X-Cache'] = 'MISS'
+            return response
+
+        return decorated_function
+    return decorator
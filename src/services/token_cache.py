@@ -0,0 +1,107 @@
+import hashlib
+import json
+import threading
+import time
+from config import Config
+from services.cache import LRUCache
+from services.redis_client import get_redis
+
+
+class TokenCache:
+    """
+    Cache de tokens de ID do Firebase já verificados.
+
+    A chave é o hash SHA-256 do token (o token em si nunca é armazenado) e cada
+    entrada expira no 'exp' do próprio token. Há uma camada LRU em memória por
+    processo e uma camada opcional compartilhada no Redis (Config.REDIS_URL).
+    """
+
+    REDIS_PREFIX = 'auth:token:'
+
+    def __init__(self, max_size=10000):
+        self._local = LRUCache(max_size=max_size)
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, token):
+        """Retorna as claims decodificadas do token, ou None em caso de miss"""
+        key = self._key(token)
+
+        claims = self._local.get(key)
+        if claims is not None:
+            self._count('local_hits')
+            return claims
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                raw = redis_client.get(self.REDIS_PREFIX + key)
+            except Exception as e:
+                print(f"Erro ao consultar cache de tokens no Redis: {e}")
+                self._count('redis_errors')
+                raw = None
+
+            if raw:
+                claims = json.loads(raw)
+                exp = claims.get('exp')
+                if exp and exp > time.time():
+                    self._local.set(key, claims, expires_at=exp)
+                    self._count('redis_hits')
+                    return claims
+
+        self._count('misses')
+        return None
+
+    def set(self, token, claims):
+        """Armazena as claims até o instante de expiração do token"""
+        exp = claims.get('exp')
+        if not exp:
+            return
+
+        ttl = int(exp - time.time())
+        if ttl <= 0:
+            return
+
+        key = self._key(token)
+        self._local.set(key, claims, expires_at=exp)
+        self._count('stores')
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.setex(self.REDIS_PREFIX + key, ttl, json.dumps(claims))
+            except Exception as e:
+                print(f"Erro ao gravar cache de tokens no Redis: {e}")
+                self._count('redis_errors')
+
+    def stats(self):
+        """Contadores de acerto/erro para acompanhar a eficiência do cache"""
+        hits = self.local_hits + self.redis_hits
+        lookups = hits + self.misses
+        return {
+            'local_hits': self.local_hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self._local.evictions,
+            'redis_errors': self.redis_errors,
+            'local_size': len(self._local),
+            'redis_enabled': get_redis() is not None
+        }
+
+
+# Instância global
+token_cache = TokenCache(max_size=Config.TOKEN_CACHE_MAX_SIZE)
@@ -0,0 +1,186 @@
+import os
+import re
+import threading
+import time
+from google.auth import jwt as google_jwt
+from config import Config
+from services.http_client import get_session
+
+
+class TokenVerificationError(Exception):
+    """Token inválido, expirado ou emitido para outro projeto"""
+
+
+class SigningKeysUnavailable(TokenVerificationError):
+    """As chaves públicas do Google ainda não foram carregadas neste processo"""
+
+
+class FirebaseTokenVerifier:
+    """
+    Verificação local (RS256) de tokens de ID do Firebase.
+
+    As chaves públicas do Google são mantidas em memória por uma thread em
+    segundo plano, que as renova antes do vencimento indicado pelo
+    Cache-Control da resposta. A verificação nunca faz requisições de rede:
+    na primeira chamada de um processo ela apenas aguarda, por um tempo
+    limitado, a carga inicial feita pela thread.
+    """
+
+    MIN_REFRESH_SECONDS = 60
+    MAX_REFRESH_SECONDS = 6 * 3600
+    RETRY_MAX_SECONDS = 300
+
+    def __init__(self, certs_url, fetch_timeout=5.0, initial_wait=5.0, max_staleness=3600.0):
+        self.certs_url = certs_url
+        self.fetch_timeout = fetch_timeout
+        self.initial_wait = initial_wait
+        # Tempo após o vencimento em que as chaves ainda são aceitas se a renovação falhar
+        self.max_staleness = max_staleness
+
+        self._keys = {}
+        self._expires_at = 0
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+
+        self.refresh_count = 0
+        self.refresh_failures = 0
+        self.last_refresh_at = None
+        self.last_error = None
+
+    # --- Renovação das chaves ---
+
+    @staticmethod
+    def _parse_max_age(cache_control):
+        match = re.search(r'max-age=(\d+)', cache_control or '')
+        return int(match.group(1)) if match else None
+
+    def refresh(self):
+        """Baixa as chaves e retorna em quantos segundos elas devem ser renovadas"""
+        response = get_session().get(self.certs_url, timeout=self.fetch_timeout)
+        response.raise_for_status()
+        keys = response.json()
+        if not isinstance(keys, dict) or not keys:
+            raise ValueError('Resposta de chaves públicas vazia ou inválida')
+
+        max_age = self._parse_max_age(response.headers.get('Cache-Control'))
+        if max_age is None:
+            max_age = self.MIN_REFRESH_SECONDS
+
+        with self._lock:
+            self._keys = keys
+            self._expires_at = time.time() + max_age
+            self.refresh_count += 1
+            self.last_refresh_at = time.time()
+            self.last_error = None
+        self._ready.set()
+
+        # Renova com folga antes de expirar
+        return min(max(max_age * 0.8, self.MIN_REFRESH_SECONDS), self.MAX_REFRESH_SECONDS)
+
+    def _run(self):
+        failures = 0
+        while True:
+            try:
+                delay = self.refresh()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                with self._lock:
+                    self.refresh_failures += 1
+                    self.last_error = str(e)
+                delay = min(2 ** failures, self.RETRY_MAX_SECONDS)
+                print(f"Erro ao atualizar chaves públicas do Firebase (tentativa {failures}): {e}")
+
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+    def start(self):
+        """Inicia a thread de renovação neste processo (idempotente e seguro após fork)"""
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid():
+                return
+            if self._thread_pid is not None and self._thread_pid != os.getpid():
+                # Processo filho: as chaves herdadas continuam válidas, a thread não
+                self._wakeup = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='firebase-keys-refresher', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def get_keys(self):
+        self.start()
+        if not self._ready.wait(self.initial_wait):
+            raise SigningKeysUnavailable('Chaves públicas do Firebase ainda não disponíveis')
+
+        with self._lock:
+            keys, expires_at = self._keys, self._expires_at
+        if time.time() > expires_at + self.max_staleness:
+            # Renovações falhando há tempo demais: não verifica com chaves que o
+            # Google pode já ter revogado; pede uma nova tentativa imediata
+            self._wakeup.set()
+            raise SigningKeysUnavailable('Chaves públicas do Firebase vencidas')
+        return keys
+
+    # --- Verificação ---
+
+    def verify(self, token, project_id):
+        """Verifica assinatura e claims do token e retorna as claims decodificadas"""
+        keys = self.get_keys()
+
+        try:
+            header = google_jwt.decode_header(token)
+        except Exception as e:
+            raise TokenVerificationError(f'Cabeçalho do token inválido: {e}')
+
+        if header.get('alg') != 'RS256':
+            raise TokenVerificationError('Algoritmo de assinatura inesperado')
+
+        kid = header.get('kid')
+        if kid not in keys:
+            # Chave nova publicada pelo Google: pede renovação antecipada
+            self._wakeup.set()
+            raise TokenVerificationError('Token assinado com chave desconhecida')
+
+        try:
+            claims = google_jwt.decode(token, certs={kid: keys[kid]}, audience=project_id)
+        except Exception as e:
+            raise TokenVerificationError(str(e))
+
+        if claims.get('iss') != f'https://securetoken.google.com/{project_id}':
+            raise TokenVerificationError('Emissor do token inválido')
+
+        subject = claims.get('sub')
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise TokenVerificationError('Subject do token inválido')
+
+        if claims.get('auth_time', 0) > time.time() + 60:
+            raise TokenVerificationError('auth_time no futuro')
+
+        claims['uid'] = subject
+        return claims
+
+    def stats(self):
+        return {
+            'keys_loaded': len(self._keys),
+            'keys_expire_in': max(int(self._expires_at - time.time()), 0),
+            'keys_stale': time.time() > self._expires_at,
+            'refresh_count': self.refresh_count,
+            'refresh_failures': self.refresh_failures,
+            'last_refresh_at': self.last_refresh_at,
+            'last_error': self.last_error,
+            'refresher_running': self._thread is not None and self._thread.is_alive() and self._thread_pid == os.getpid()
+        }
+
+
+# Instância global
+token_verifier = FirebaseTokenVerifier(
+    certs_url=Config.FIREBASE_CERTS_URL,
+    fetch_timeout=Config.FIREBASE_CERTS_TIMEOUT,
+    initial_wait=Config.FIREBASE_CERTS_INITIAL_WAIT,
+    max_staleness=Config.FIREBASE_CERTS_MAX_STALENESS
+)
@@ -0,0 +1,81 @@
+from flask import g, has_app_context
+from pymongo import ReturnDocument
+from database.mongodb import mongodb
+from services.redis_client import get_redis
+
+
+class VersionCounter:
+    """
+    Contador de versão por usuário, usado para invalidar caches.
+
+    Cada escrita incrementa a versão do usuário; as chaves de cache incluem a
+    versão, então entradas antigas deixam de ser encontradas. A versão fica no
+    Redis quando configurado; caso contrário (ou se o Redis falhar) na coleção
+    cache_versions do MongoDB, um documento por (namespace, usuário), para que
+    todos os workers enxerguem a invalidação. Dentro de uma requisição o valor
+    lido é reaproveitado (flask.g).
+    """
+
+    COLLECTION = 'cache_versions'
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+
+    def _redis_key(self, user_id):
+        return f'version:{self.namespace}:{user_id}'
+
+    def _doc_id(self, user_id):
+        return f'{self.namespace}:{user_id}'
+
+    @staticmethod
+    def _request_store():
+        if not has_app_context():
+            return None
+        store = getattr(g, '_cache_versions', None)
+        if store is None:
+            store = g._cache_versions = {}
+        return store
+
+    def get(self, user_id):
+        store = self._request_store()
+        if store is not None and (self.namespace, user_id) in store:
+            return store[(self.namespace, user_id)]
+
+        version = None
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                value = redis_client.get(self._redis_key(user_id))
+                version = int(value) if value else 0
+            except Exception as e:
+                print(f"Erro ao ler versão '{self.namespace}' no Redis: {e}")
+        if version is None:
+            doc = mongodb.db[self.COLLECTION].find_one({'_id': self._doc_id(user_id)}, {'version': 1})
+            version = doc['version'] if doc else 0
+
+        if store is not None:
+            store[(self.namespace, user_id)] = version
+        return version
+
+    def bump(self, user_id):
+        """Incrementa a versão do usuário e retorna o novo valor"""
+        version = None
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                version = int(redis_client.incr(self._redis_key(user_id)))
+            except Exception as e:
+                print(f"Erro ao incrementar versão '{self.namespace}' no Redis: {e}")
+        if version is None:
+            doc = mongodb.db[self.COLLECTION].find_one_and_update(
+                {'_id': self._doc_id(user_id)},
+                {'$inc': {'version': 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            version = doc['version']
+
+        store = self._request_store()
+        if store is not None:
+            store[(self.namespace, user_id)] = version
+        return version
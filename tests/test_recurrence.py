@@ -0,0 +1,74 @@
+"""Testes de services/recurrence.py (sem banco de dados)"""
+from datetime import date
+from itertools import islice
+
+import pytest
+
+from services import recurrence
+
+RULES = [('weekly', 0), ('weekly', 6), ('monthly', 1), ('monthly', 15), ('monthly', 29),
+         ('monthly', 31), ('yearly', 1), ('yearly', 60), ('yearly', 365), ('yearly', 366)]
+
+
+@pytest.mark.parametrize('frequency,day', RULES)
+@pytest.mark.parametrize('start', [date(2023, 1, 31), date(2024, 2, 29), date(2024, 12, 31)])
+def test_page_matches_iter_occurrences(frequency, day, start):
+    end = recurrence.add_months(start, 60)
+    expected = list(recurrence.iter_occurrences(frequency, day, start, end))
+
+    items, total = recurrence.page(frequency, day, start, end, offset=0, limit=10 ** 6)
+    assert items == expected
+    assert total == len(expected)
+
+    # Páginas consecutivas reconstroem a sequência completa
+    pages = []
+    for offset in range(0, total, 7):
+        page, page_total = recurrence.page(frequency, day, start, end, offset=offset, limit=7)
+        assert page_total == total
+        pages.extend(page)
+    assert pages == expected
+
+
+def test_page_after_the_end_is_empty():
+    items, total = recurrence.page('monthly', 10, date(2024, 1, 1), date(2024, 12, 31), offset=50, limit=10)
+    assert items == []
+    assert total == 12
+
+
+def test_monthly_clamps_to_month_end_and_returns_to_original_day():
+    occurrences = list(islice(recurrence.iter_occurrences('monthly', 31, date(2023, 1, 1)), 5))
+    assert occurrences == [date(2023, 1, 31), date(2023, 2, 28), date(2023, 3, 31),
+                           date(2023, 4, 30), date(2023, 5, 31)]
+
+
+def test_monthly_day_29_in_leap_and_common_february():
+    assert recurrence.first_on_or_after('monthly', 29, date(2024, 2, 1)) == date(2024, 2, 29)
+    assert recurrence.first_on_or_after('monthly', 29, date(2023, 2, 1)) == date(2023, 2, 28)
+    assert recurrence.next_after('monthly', 31, date(2024, 1, 31)) == date(2024, 2, 29)
+
+
+def test_yearly_day_366_only_in_leap_years():
+    occurrences = list(islice(recurrence.iter_occurrences('yearly', 366, date(2023, 1, 1)), 3))
+    assert occurrences == [date(2023, 12, 31), date(2024, 12, 31), date(2025, 12, 31)]
+    # Dia 60 é 29/02 em ano bissexto e 01/03 nos demais
+    assert recurrence.first_on_or_after('yearly', 60, date(2024, 1, 1)) == date(2024, 2, 29)
+    assert recurrence.first_on_or_after('yearly', 60, date(2025, 1, 1)) == date(2025, 3, 1)
+
+
+def test_add_months_clamps_to_month_end():
+    assert recurrence.add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+    assert recurrence.add_months(date(2023, 1, 31), 1) == date(2023, 2, 28)
+    assert recurrence.add_months(date(2024, 2, 29), 12) == date(2025, 2, 28)
+
+
+def test_count_until_excludes_last_period_occurrence_after_end():
+    # 31/03 cai depois de 15/03: só janeiro e fevereiro entram
+    assert recurrence.count_until('monthly', 31, date(2023, 1, 31), date(2023, 3, 15)) == 2
+    assert recurrence.count_until('monthly', 31, date(2023, 1, 31), date(2023, 1, 30)) == 0
+
+
+@pytest.mark.parametrize('frequency,day', [('weekly', 7), ('monthly', 0), ('monthly', 32),
+                                           ('yearly', 367), ('daily', 1)])
+def test_validate_rejects_invalid_rules(frequency, day):
+    with pytest.raises(ValueError):
+        recurrence.validate(frequency, day)
@@ -0,0 +1,69 @@
+"""Idempotência de RecurringTemplate.materialize contra um MongoDB em memória.
+
+Requer mongomock (pip install -r requirements-test.txt).
+"""
+import os
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('pymongo')
+pytest.importorskip('flask')
+mongomock = pytest.importorskip('mongomock')
+
+from config import Config  # noqa: E402
+from database.mongodb import MongoDB  # noqa: E402
+from models.recurring_mongo import RecurringTemplate  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(MongoDB, '_client', client)
+    monkeypatch.setattr(MongoDB, '_client_pid', os.getpid())
+    monkeypatch.setattr(Config, 'REDIS_URL', None)
+    database = client[Config.MONGO_DB_NAME]
+    database.transactions.create_index('recurrence_key', unique=True,
+                                       partialFilterExpression={'recurrence_key': {'$type': 'string'}})
+    return database
+
+
+def _template(db, next_occurrence):
+    template_id = RecurringTemplate.create({
+        'user_id': 'user-1',
+        'description': 'Aluguel',
+        'amount': 1500.0,
+        'category_id': 'cat-1',
+        'type': 'expense',
+        'context': 'personal',
+        'recurring_frequency': 'monthly',
+        'recurring_day': 31,
+        'next_occurrence': next_occurrence
+    })
+    return db.recurring_templates.find_one({'_id': template_id})
+
+
+def test_materialize_twice_creates_no_duplicates(db):
+    template = _template(db, datetime(2024, 1, 31))
+    until = datetime(2024, 4, 30)
+
+    created = RecurringTemplate.materialize([template], until)
+    assert [item['date'][:10] for item in created] == ['2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30']
+
+    # Nova execução com o mesmo documento (ex.: outra instância que leu antes do avanço)
+    assert RecurringTemplate.materialize([template], until) == []
+    assert db.transactions.count_documents({'recurring_template_id': str(template['_id'])}) == 4
+
+    stored = db.recurring_templates.find_one({'_id': template['_id']})
+    assert stored['next_occurrence'] == datetime(2024, 5, 31)
+
+
+def test_process_due_after_materialize_is_a_no_op(db):
+    template = _template(db, datetime(2024, 1, 31))
+    until = datetime(2024, 2, 29)
+
+    assert len(RecurringTemplate.process_due(until=until)) == 2
+    assert RecurringTemplate.process_due(until=until) == []
+    assert db.transactions.count_documents({}) == 2
+    assert RecurringTemplate.due_templates(until) == []
+    assert db.recurring_templates.find_one({'_id': template['_id']})['next_occurrence'] == datetime(2024, 3, 31)
@@ -0,0 +1,173 @@
+"""Verificação local de tokens contra um servidor de chaves local (sem Google).
+
+Gera pares RSA e certificados x509 autoassinados, serve-os no formato do
+endpoint do Firebase ({kid: certificado PEM}) e assina tokens RS256 com eles.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('google.auth')
+pytest.importorskip('cryptography')
+
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+from google.auth import crypt, jwt as google_jwt  # noqa: E402
+
+from services.token_verifier import (  # noqa: E402
+    FirebaseTokenVerifier, SigningKeysUnavailable, TokenVerificationError
+)
+
+PROJECT_ID = 'projeto-teste'
+
+
+def _key_pair():
+    """(chave privada PEM, certificado x509 PEM) de um par RSA novo"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'securetoken.local')])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return private_pem, certificate.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def _token(private_pem, kid, subject='user-1'):
+    now = int(time.time())
+    payload = {
+        'iss': f'https://securetoken.google.com/{PROJECT_ID}',
+        'aud': PROJECT_ID,
+        'sub': subject,
+        'iat': now,
+        'exp': now + 3600,
+        'auth_time': now
+    }
+    signer = crypt.RSASigner.from_string(private_pem, key_id=kid)
+    return google_jwt.encode(signer, payload).decode()
+
+
+class KeyServer:
+    """Servidor HTTP local com as chaves públicas; conteúdo e status alteráveis no teste"""
+
+    def __init__(self):
+        self.certs = {}
+        self.max_age = 3600
+        self.status = 200
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                body = json.dumps(server.certs).encode()
+                self.send_response(server.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Cache-Control', f'public, max-age={server.max_age}')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/certs'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def key_server():
+    server = KeyServer()
+    yield server
+    server.close()
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_valid_token(key_server):
+    private_pem, certificate = _key_pair()
+    key_server.certs = {'kid-a': certificate}
+    verifier = FirebaseTokenVerifier(key_server.url, initial_wait=5)
+
+    claims = verifier.verify(_token(private_pem, 'kid-a'), PROJECT_ID)
+
+    assert claims['uid'] == 'user-1'
+    assert verifier.refresh_count == 1
+
+
+def test_token_for_another_project_is_rejected(key_server):
+    private_pem, certificate = _key_pair()
+    key_server.certs = {'kid-a': certificate}
+    verifier = FirebaseTokenVerifier(key_server.url, initial_wait=5)
+
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(_token(private_pem, 'kid-a'), 'outro-projeto')
+
+
+def test_unknown_kid_triggers_refresh(key_server):
+    _, certificate_a = _key_pair()
+    private_b, certificate_b = _key_pair()
+    key_server.certs = {'kid-a': certificate_a}
+    verifier = FirebaseTokenVerifier(key_server.url, initial_wait=5)
+    verifier.get_keys()
+
+    # Chave publicada depois da última renovação: rejeita e pede renovação antecipada
+    key_server.certs = {'kid-a': certificate_a, 'kid-b': certificate_b}
+    token = _token(private_b, 'kid-b')
+    with pytest.raises(TokenVerificationError) as error:
+        verifier.verify(token, PROJECT_ID)
+    assert not isinstance(error.value, SigningKeysUnavailable)
+
+    assert _wait_for(lambda: verifier.refresh_count >= 2)
+    assert verifier.verify(token, PROJECT_ID)['uid'] == 'user-1'
+
+
+def test_expired_keys_are_refused_until_refreshed(key_server):
+    private_pem, certificate = _key_pair()
+    key_server.certs = {'kid-a': certificate}
+    key_server.max_age = 0
+    verifier = FirebaseTokenVerifier(key_server.url, initial_wait=5, max_staleness=0)
+    verifier.start()
+    assert _wait_for(lambda: verifier.refresh_count == 1)
+
+    # Renovações falhando e chaves vencidas além da tolerância: 503 na camada de auth
+    key_server.status = 500
+    requests_before = key_server.requests
+    token = _token(private_pem, 'kid-a')
+    with pytest.raises(SigningKeysUnavailable):
+        verifier.verify(token, PROJECT_ID)
+    # A recusa força uma nova tentativa imediata de renovação
+    assert _wait_for(lambda: key_server.requests > requests_before)
+
+    key_server.max_age = 3600
+    key_server.status = 200
+    assert _wait_for(lambda: verifier.stats()['keys_expire_in'] > 0)
+    assert verifier.verify(token, PROJECT_ID)['uid'] == 'user-1'